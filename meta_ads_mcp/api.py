@@ -26,6 +26,10 @@ META_GRAPH_API_VERSION = "v22.0"
 META_GRAPH_API_BASE = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}"
 USER_AGENT = "meta-ads-mcp/1.0"
 
+# Graph API error codes that mean the token or app credentials need attention
+_AUTH_ERROR_CODES = frozenset({190, 102, 4, 200, 10})
+_TOKEN_ERROR_CODES = frozenset({190, 102, 4})
+
 # Meta App configuration 
 META_APP_ID = os.environ.get("META_APP_ID", "")  # Default to empty string
 
@@ -370,7 +374,7 @@ class GraphAPIError(Exception):
         super().__init__(self.message)
         
         # Check if this is an auth error
-        if "code" in error_data and error_data["code"] in [190, 102, 4]:
+        if "code" in error_data and error_data["code"] in _TOKEN_ERROR_CODES:
             # Common auth error codes
             auth_manager.invalidate_token()
 
@@ -447,7 +451,7 @@ async def make_api_request(
             elif "error" in error_info:
                 error_obj = error_info.get("error", {})
                 # Check for specific FB API errors related to auth
-                if isinstance(error_obj, dict) and error_obj.get("code") in [190, 102, 4, 200, 10]:
+                if isinstance(error_obj, dict) and error_obj.get("code") in _AUTH_ERROR_CODES:
                     print(f"Detected Facebook API auth error: {error_obj.get('code')}")
                     # For app ID errors, provide more useful error message
                     if error_obj.get("code") == 200 and "Provide valid app ID" in error_obj.get("message", ""):
@@ -479,14 +483,19 @@ def meta_api_tool(func):
         if len(args) == 1:
             # MCP might pass a single string argument that contains JSON
             if isinstance(args[0], str):
-                try:
-                    # Try to parse the single string argument as JSON dictionary
-                    parsed_kwargs = json.loads(args[0]) if args[0] else {}
-                    # Clear args and use parsed_kwargs
+                arg = args[0]
+                if not arg:
                     args = ()
-                    kwargs.update(parsed_kwargs)
-                except Exception:
-                    pass
+                # Only a JSON object can carry kwargs, so plain values like IDs skip the parser
+                elif arg.lstrip().startswith("{"):
+                    try:
+                        parsed_kwargs = json.loads(arg)
+                    except ValueError:
+                        parsed_kwargs = None
+                    if isinstance(parsed_kwargs, dict):
+                        # Clear args and use parsed_kwargs
+                        args = ()
+                        kwargs.update(parsed_kwargs)
             # MCP might also pass a single dictionary argument
             elif isinstance(args[0], dict):
                 # Treat the dict as kwargs
@@ -497,12 +506,16 @@ def meta_api_tool(func):
         if 'kwargs' in kwargs and isinstance(kwargs['kwargs'], (str, dict)):
             # If it's a string, try to parse as JSON
             if isinstance(kwargs['kwargs'], str):
-                try:
-                    parsed_inner_kwargs = json.loads(kwargs['kwargs']) if kwargs['kwargs'] else {}
-                    kwargs.update(parsed_inner_kwargs)
-                except Exception:
-                    # If parsing fails, just keep the original kwargs
-                    pass
+                inner = kwargs['kwargs']
+                # Skip the parser unless the string can be a JSON object;
+                # otherwise just keep the original kwargs
+                if inner.lstrip().startswith("{"):
+                    try:
+                        parsed_inner_kwargs = json.loads(inner)
+                    except ValueError:
+                        parsed_inner_kwargs = None
+                    if isinstance(parsed_inner_kwargs, dict):
+                        kwargs.update(parsed_inner_kwargs)
             # If it's already a dict, just update kwargs
             elif isinstance(kwargs['kwargs'], dict):
                 kwargs.update(kwargs['kwargs'])
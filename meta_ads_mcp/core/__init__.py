@@ -3,7 +3,7 @@
 from .server import mcp_server
 from .accounts import get_ad_accounts, get_account_info
 from .campaigns import get_campaigns, get_campaign_details, create_campaign
-from .adsets import get_adsets, get_adset_details, update_adset
+from .adsets import get_adsets, get_adset_details, get_adset_details_bulk, update_adset
 from .ads import get_ads, get_ad_details, get_ad_creatives, get_ad_image, update_ad
 from .insights import get_insights, debug_image_download
 from .authentication import get_login_link
@@ -20,6 +20,7 @@ __all__ = [
     'create_campaign',
     'get_adsets',
     'get_adset_details',
+    'get_adset_details_bulk',
     'update_adset',
     'get_ads',
     'get_ad_details',
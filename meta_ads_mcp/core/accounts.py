@@ -1,9 +1,39 @@
 """Account-related functionality for Meta Ads API."""
 
-import json
-from typing import Optional
-from .api import meta_api_tool, make_api_request
+from typing import Optional, Dict, Any
+from .api import meta_api_tool, make_api_request_with_backoff
 from .server import mcp_server
+from .utils import json_dumps
+
+# Fields requested by get_account_info
+_ACCOUNT_INFO_FIELDS = "id,name,account_id,account_status,amount_spent,balance,currency,age,funding_source_details,business_city,business_country_code,timezone_name,owner"
+
+
+async def _get_ad_accounts(
+    access_token: str,
+    user_id: str = "me",
+    limit: int = 10,
+    fields: str = "id,name,account_id,account_status,amount_spent,balance,currency,age,business_city,business_country_code"
+) -> Dict[str, Any]:
+    """
+    Fetch ad accounts accessible by a user as a dictionary.
+    
+    Used by tools that need account data internally, so they don't have to
+    round-trip through the get_ad_accounts tool's JSON output.
+    
+    Args:
+        access_token: Meta API access token
+        user_id: Meta user ID or "me" for the current user
+        limit: Maximum number of accounts to return
+        fields: Comma-separated account fields to request
+    """
+    endpoint = f"{user_id}/adaccounts"
+    params = {
+        "fields": fields,
+        "limit": limit
+    }
+    
+    return await make_api_request_with_backoff(endpoint, access_token, params)
 
 
 @mcp_server.tool()
@@ -17,15 +47,9 @@ async def get_ad_accounts(access_token: str = None, user_id: str = "me", limit:
         user_id: Meta user ID or "me" for the current user
         limit: Maximum number of accounts to return (default: 10)
     """
-    endpoint = f"{user_id}/adaccounts"
-    params = {
-        "fields": "id,name,account_id,account_status,amount_spent,balance,currency,age,business_city,business_country_code",
-        "limit": limit
-    }
-    
-    data = await make_api_request(endpoint, access_token, params)
+    data = await _get_ad_accounts(access_token, user_id, limit)
     
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -40,13 +64,12 @@ async def get_account_info(access_token: str = None, account_id: str = None) ->
     """
     # If no account ID is specified, try to get the first one for the user
     if not account_id:
-        accounts_json = await get_ad_accounts("me", json.dumps({"limit": 1}), access_token)
-        accounts_data = json.loads(accounts_json)
+        accounts_data = await _get_ad_accounts(access_token, "me", 1, fields="id")
         
         if "data" in accounts_data and accounts_data["data"]:
             account_id = accounts_data["data"][0]["id"]
         else:
-            return json.dumps({"error": "No account ID specified and no accounts found for user"}, indent=2)
+            return json_dumps({"error": "No account ID specified and no accounts found for user"})
     
     # Ensure account_id has the 'act_' prefix for API compatibility
     if not account_id.startswith("act_"):
@@ -54,9 +77,9 @@ async def get_account_info(access_token: str = None, account_id: str = None) ->
     
     endpoint = f"{account_id}"
     params = {
-        "fields": "id,name,account_id,account_status,amount_spent,balance,currency,age,funding_source_details,business_city,business_country_code,timezone_name,owner"
+        "fields": _ACCOUNT_INFO_FIELDS
     }
     
-    data = await make_api_request(endpoint, access_token, params)
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
     
-    return json.dumps(data, indent=2) 
\ No newline at end of file
+    return json_dumps(data) 
\ No newline at end of file
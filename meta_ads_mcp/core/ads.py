@@ -1,23 +1,96 @@
 """Ad and Creative-related functionality for Meta Ads API."""
 
-import json
+import orjson
 from typing import Optional, Dict, Any, List
 import io
-from PIL import Image as PILImage
+import functools
 from mcp.server.fastmcp import Image
 import os
+import mimetypes
 import time
+import asyncio
+import hashlib
+from urllib.parse import urlencode
 
-from .api import meta_api_tool, make_api_request
-from .accounts import get_ad_accounts
-from .utils import download_image, try_multiple_download_methods, ad_creative_images
+from .api import meta_api_tool, make_api_request_with_backoff, make_batch_api_request
+from .accounts import _get_ad_accounts
+from .utils import logger, download_image, try_multiple_download_methods, ad_creative_images, json_dumps, TTLCache, read_cached_image, write_cached_image
 from .server import mcp_server
 
+# Graph API field selections shared across tools
+_AD_LIST_FIELDS = ("id", "name", "status", "adset_id", "campaign_id")
+_AD_FIELDS = "id,name,adset_id,campaign_id,status,creative,created_time,updated_time,bid_amount,conversion_domain,tracking_specs"
+_AD_DETAIL_FIELDS = _AD_FIELDS + ",preview_shareable_link"
+_CREATIVE_FIELDS = "id,name,status,thumbnail_url,image_url,image_hash,object_story_spec"
+_CREATED_CREATIVE_FIELDS = _CREATIVE_FIELDS + ",url_tags,link_url"
+# Only the nested creative fields the image resolver reads, so large creatives aren't returned whole
+_AD_IMAGE_FIELDS = "account_id,creative{id,image_hash,asset_feed_spec{images{hash}},object_story_spec{link_data{image_hash}}}"
+_PAGE_FIELDS = "id,name,username,category,fan_count,link,verification_status,picture"
+
+# Largest page size requested from the ads edge; bigger limits are paged with cursors
+MAX_ADS_PAGE_SIZE = 500
+
+# ad_id -> resolved account/creative/image hashes, and (account_id, image_hash) -> image URL
+_ad_image_cache = TTLCache(maxsize=1024, ttl=300)
+_image_url_cache = TTLCache(maxsize=2048, ttl=1800)
+# (account_id, sha256, name) -> adimages upload response, so identical re-uploads are skipped
+_uploaded_images = TTLCache(maxsize=256, ttl=86400)
+
+
+# Leading magic bytes of the image formats Meta serves, mapped to file extensions
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG", ".png"),
+    (b"GIF8", ".gif"),
+    (b"RIFF", ".webp"),
+)
+
+# Source JPEGs up to this size are passed through without re-encoding
+JPEG_PASSTHROUGH_MAX_BYTES = 1024 * 1024
+
+
+def _image_extension(image_bytes: bytes) -> str:
+    """Pick a file extension from the image's magic bytes, defaulting to .jpg"""
+    for signature, extension in _IMAGE_SIGNATURES:
+        if image_bytes.startswith(signature):
+            return extension
+    return ".jpg"
+
+
+@functools.cache
+def _get_pil():
+    """Import Pillow on first use so tools that never touch images don't pay for it"""
+    from PIL import Image as PILImage
+    return PILImage
+
+
+def _hash_file(filepath: str) -> str:
+    """Compute a file's SHA-256 in chunks; run via asyncio.to_thread"""
+    with open(filepath, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _write_file(filepath: str, data: bytes) -> None:
+    """Write bytes to a file; run via asyncio.to_thread to keep the event loop free"""
+    with open(filepath, "wb") as f:
+        f.write(data)
+
+
+def _dig(data: Any, *path: str, default: Any = None) -> Any:
+    """Walk nested dicts along path, returning default if any key is missing"""
+    current = data
+    for key in path:
+        current = current.get(key) if isinstance(current, dict) else None
+        if current is None:
+            return default
+    return current
+
 
 @mcp_server.tool()
 @meta_api_tool
 async def get_ads(access_token: str = None, account_id: str = None, limit: int = 10, 
-                 campaign_id: str = "", adset_id: str = "") -> str:
+                 campaign_id: str = "", adset_id: str = "", fields: Optional[List[str]] = None,
+                 include_creative: bool = False, include_tracking: bool = False) -> str:
     """
     Get ads for a Meta Ads account with optional filtering.
     
@@ -27,41 +100,60 @@ async def get_ads(access_token: str = None, account_id: str = None, limit: int =
         limit: Maximum number of ads to return (default: 10)
         campaign_id: Optional campaign ID to filter by
         adset_id: Optional ad set ID to filter by
+        fields: Optional list of ad fields to return (default: id, name, status, adset_id, campaign_id)
+        include_creative: Also return the creative reference for each ad
+        include_tracking: Also return tracking_specs for each ad
     """
     # If no account ID is specified, try to get the first one for the user
     if not account_id:
-        accounts_json = await get_ad_accounts("me", json.dumps({"limit": 1}), access_token)
-        accounts_data = json.loads(accounts_json)
+        # Only the first account's ID is needed
+        accounts_data = await _get_ad_accounts(access_token, "me", 1, fields="id")
         
         if "data" in accounts_data and accounts_data["data"]:
             account_id = accounts_data["data"][0]["id"]
         else:
-            return json.dumps({"error": "No account ID specified and no accounts found for user"}, indent=2)
-    
-    # Use campaign-specific endpoint if campaign_id is provided
-    if campaign_id:
-        endpoint = f"{campaign_id}/ads"
-        params = {
-            "fields": "id,name,adset_id,campaign_id,status,creative,created_time,updated_time,bid_amount,conversion_domain,tracking_specs",
-            "limit": limit
-        }
-        # Adset ID can still be used to filter within the campaign
-        if adset_id:
-            params["adset_id"] = adset_id
-    else:
-        # Default to account-level endpoint if no campaign_id
-        endpoint = f"{account_id}/ads"
+            return json_dumps({"error": "No account ID specified and no accounts found for user"})
+    
+    # Request only what the caller needs; creative and tracking_specs are large
+    field_list = list(fields) if fields else list(_AD_LIST_FIELDS)
+    if include_creative and "creative" not in field_list:
+        field_list.append("creative")
+    if include_tracking and "tracking_specs" not in field_list:
+        field_list.append("tracking_specs")
+    
+    # Use campaign-specific endpoint if campaign_id is provided, else the account-level one
+    endpoint = f"{campaign_id}/ads" if campaign_id else f"{account_id}/ads"
+    
+    ads = []
+    data = {}
+    after = None
+    while len(ads) < limit:
         params = {
-            "fields": "id,name,adset_id,campaign_id,status,creative,created_time,updated_time,bid_amount,conversion_domain,tracking_specs",
-            "limit": limit
+            "fields": ",".join(field_list),
+            "limit": min(limit - len(ads), MAX_ADS_PAGE_SIZE)
         }
-        # Adset ID can filter at the account level if no campaign specified
+        # Adset ID can filter within the campaign or at the account level
         if adset_id:
             params["adset_id"] = adset_id
-
-    data = await make_api_request(endpoint, access_token, params)
+        if after:
+            params["after"] = after
+        
+        data = await make_api_request_with_backoff(endpoint, access_token, params)
+        if "error" in data:
+            # Return what we have if a later page fails, otherwise the error
+            if not ads:
+                return json_dumps(data)
+            break
+        
+        ads.extend(data.get("data", []))
+        after = _dig(data, "paging", "cursors", "after")
+        if not after or "next" not in data.get("paging", {}):
+            break
     
-    return json.dumps(data, indent=2)
+    result = {"data": ads[:limit]}
+    if "paging" in data:
+        result["paging"] = data["paging"]
+    return json_dumps(result)
 
 
 @mcp_server.tool()
@@ -75,16 +167,16 @@ async def get_ad_details(access_token: str = None, ad_id: str = None) -> str:
         ad_id: Meta Ads ad ID
     """
     if not ad_id:
-        return json.dumps({"error": "No ad ID provided"}, indent=2)
+        return json_dumps({"error": "No ad ID provided"})
         
     endpoint = f"{ad_id}"
     params = {
-        "fields": "id,name,adset_id,campaign_id,status,creative,created_time,updated_time,bid_amount,conversion_domain,tracking_specs,preview_shareable_link"
+        "fields": _AD_DETAIL_FIELDS
     }
     
-    data = await make_api_request(endpoint, access_token, params)
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
     
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -115,16 +207,16 @@ async def create_ad(
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     if not name:
-        return json.dumps({"error": "No ad name provided"}, indent=2)
+        return json_dumps({"error": "No ad name provided"})
     
     if not adset_id:
-        return json.dumps({"error": "No ad set ID provided"}, indent=2)
+        return json_dumps({"error": "No ad set ID provided"})
     
     if not creative_id:
-        return json.dumps({"error": "No creative ID provided"}, indent=2)
+        return json_dumps({"error": "No creative ID provided"})
     
     endpoint = f"{account_id}/ads"
     
@@ -141,18 +233,18 @@ async def create_ad(
         
     # Add tracking specs if provided
     if tracking_specs is not None:
-        params["tracking_specs"] = json.dumps(tracking_specs) # Needs to be JSON encoded string
+        params["tracking_specs"] = orjson.dumps(tracking_specs).decode() # Needs to be JSON encoded string
     
     try:
-        data = await make_api_request(endpoint, access_token, params, method="POST")
-        return json.dumps(data, indent=2)
+        data = await make_api_request_with_backoff(endpoint, access_token, params, method="POST")
+        return json_dumps(data)
     except Exception as e:
         error_msg = str(e)
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to create ad",
             "details": error_msg,
             "params_sent": params
-        }, indent=2)
+        })
 
 
 @mcp_server.tool()
@@ -166,131 +258,210 @@ async def get_ad_creatives(access_token: str = None, ad_id: str = None) -> str:
         ad_id: Meta Ads ad ID
     """
     if not ad_id:
-        return json.dumps({"error": "No ad ID provided"}, indent=2)
+        return json_dumps({"error": "No ad ID provided"})
         
     endpoint = f"{ad_id}/adcreatives"
     params = {
-        "fields": "id,name,status,thumbnail_url,image_url,image_hash,object_story_spec" # Added image_hash
+        "fields": _CREATIVE_FIELDS
     }
     
-    data = await make_api_request(endpoint, access_token, params)
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
     
     # Add image URLs for direct viewing if available
     if 'data' in data:
         for creative in data['data']:
             creative['image_urls_for_viewing'] = ad_creative_images(creative)
 
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
-@mcp_server.tool()
-@meta_api_tool
-async def get_ad_image(access_token: str = None, ad_id: str = None) -> Image:
+async def _resolve_ad_creative(ad_id: str, access_token: str) -> Dict[str, Any]:
     """
-    Get, download, and visualize a Meta ad image in one step. Useful to see the image in the LLM.
+    Resolve the account, creative and image hashes behind an ad.
+    
+    The creative's image fields are expanded inline on the ad request, so this
+    is a single Graph call (or none, when the result is cached).
     
     Args:
-        access_token: Meta API access token (optional - will use cached token if not provided)
         ad_id: Meta Ads ad ID
+        access_token: Meta API access token
     
     Returns:
-        The ad image ready for direct visual analysis
+        Dictionary with account_id (None if the ad has none), creative_id and
+        image_hashes (possibly empty), or an "error" key
     """
-    if not ad_id:
-        return "Error: No ad ID provided"
-        
-    print(f"Attempting to get and analyze creative image for ad {ad_id}")
+    cached = _ad_image_cache.get(ad_id)
+    if cached:
+        return cached
     
-    # First, get creative and account IDs
-    ad_endpoint = f"{ad_id}"
     ad_params = {
-        "fields": "creative{id},account_id"
+        "fields": _AD_IMAGE_FIELDS
     }
     
-    ad_data = await make_api_request(ad_endpoint, access_token, ad_params)
+    ad_data = await make_api_request_with_backoff(ad_id, access_token, ad_params)
     
     if "error" in ad_data:
-        return f"Error: Could not get ad data - {json.dumps(ad_data)}"
+        return {"error": f"Could not get ad data - {orjson.dumps(ad_data).decode()}"}
     
-    # Extract account_id
-    account_id = ad_data.get("account_id", "")
-    if not account_id:
-        return "Error: No account ID found"
-    
-    # Extract creative ID
-    if "creative" not in ad_data:
-        return "Error: No creative found for this ad"
-        
-    creative_data = ad_data.get("creative", {})
-    creative_id = creative_data.get("id")
-    if not creative_id:
-        return "Error: No creative ID found"
+    account_id = ad_data.get("account_id")
     
-    # Get creative details to find image hash
-    creative_endpoint = f"{creative_id}"
-    creative_params = {
-        "fields": "id,name,image_hash,asset_feed_spec"
-    }
+    creative = ad_data.get("creative")
+    if not creative:
+        return {"error": "No creative found for this ad"}
     
-    creative_details = await make_api_request(creative_endpoint, access_token, creative_params)
+    if not creative.get("id"):
+        return {"error": "No creative ID found"}
     
-    # Identify image hashes to use from creative
+    # Identify image hashes to use from the creative
     image_hashes = []
     
     # Check for direct image_hash on creative
-    if "image_hash" in creative_details:
-        image_hashes.append(creative_details["image_hash"])
+    if "image_hash" in creative:
+        image_hashes.append(creative["image_hash"])
     
     # Check asset_feed_spec for image hashes - common in Advantage+ ads
-    if "asset_feed_spec" in creative_details and "images" in creative_details["asset_feed_spec"]:
-        for image in creative_details["asset_feed_spec"]["images"]:
-            if "hash" in image:
-                image_hashes.append(image["hash"])
-    
-    if not image_hashes:
-        # If no hashes found, try to extract from the first creative we found in the API
-        # Get creative for ad to try to extract hash
-        creative_json = await get_ad_creatives(ad_id, "", access_token)
-        creative_data = json.loads(creative_json)
-        
-        # Try to extract hash from asset_feed_spec
-        if "asset_feed_spec" in creative_data and "images" in creative_data["asset_feed_spec"]:
-            images = creative_data["asset_feed_spec"]["images"]
-            if images and len(images) > 0 and "hash" in images[0]:
-                image_hashes.append(images[0]["hash"])
+    for image in _dig(creative, "asset_feed_spec", "images", default=[]):
+        image_hash = image.get("hash")
+        if image_hash and image_hash not in image_hashes:
+            image_hashes.append(image_hash)
+    
+    # Single-image link ads keep the hash in the story spec
+    link_hash = _dig(creative, "object_story_spec", "link_data", "image_hash")
+    if link_hash and link_hash not in image_hashes:
+        image_hashes.append(link_hash)
+    
+    resolved = {
+        "account_id": account_id,
+        "creative_id": creative["id"],
+        "image_hashes": image_hashes
+    }
+    _ad_image_cache.set(ad_id, resolved)
+    return resolved
+
+
+async def _get_image_url(account_id: str, image_hashes: List[str], access_token: str) -> Dict[str, Any]:
+    """
+    Look up the download URL for the first available image hash.
     
-    if not image_hashes:
-        return "Error: No image hashes found in creative"
+    Args:
+        account_id: Meta Ads account ID (without the act_ prefix)
+        image_hashes: Image hashes in order of preference
+        access_token: Meta API access token
     
-    print(f"Found image hashes: {image_hashes}")
+    Returns:
+        Dictionary with image_url, or an "error" key
+    """
+    image_url = _image_url_cache.get((account_id, image_hashes[0]))
+    if image_url:
+        return {"image_url": image_url}
     
-    # Now fetch image data using adimages endpoint with specific format
+    # Look up every hash in a single adimages request
     image_endpoint = f"act_{account_id}/adimages"
-    
-    # Format the hashes parameter exactly as in our successful curl test
-    hashes_str = f'["{image_hashes[0]}"]'  # Format first hash only, as JSON string array
-    
     image_params = {
-        "fields": "hash,url,width,height,name,status",
-        "hashes": hashes_str
+        "fields": "hash,url",
+        "hashes": orjson.dumps(image_hashes).decode()
     }
     
     print(f"Requesting image data with params: {image_params}")
-    image_data = await make_api_request(image_endpoint, access_token, image_params)
+    image_data = await make_api_request_with_backoff(image_endpoint, access_token, image_params)
     
     if "error" in image_data:
-        return f"Error: Failed to get image data - {json.dumps(image_data)}"
+        return {"error": f"Failed to get image data - {orjson.dumps(image_data).decode()}"}
     
     if "data" not in image_data or not image_data["data"]:
-        return "Error: No image data returned from API"
+        return {"error": "No image data returned from API"}
     
-    # Get the first image URL
-    first_image = image_data["data"][0]
-    image_url = first_image.get("url")
+    # Prefer the primary hash; the endpoint does not guarantee result order
+    image_urls = {}
+    for image in image_data["data"]:
+        if image.get("hash") and image.get("url"):
+            image_urls[image["hash"]] = image["url"]
+            _image_url_cache.set((account_id, image["hash"]), image["url"])
+    image_url = image_urls.get(image_hashes[0]) or next(iter(image_urls.values()), None)
     
     if not image_url:
-        return "Error: No valid image URL found"
+        return {"error": "No valid image URL found in API response"}
+    
+    return {"image_url": image_url}
+
+
+async def _resolve_image_url(ad_id: str, access_token: str) -> Dict[str, Any]:
+    """
+    Resolve the image hashes and download URL for an ad's creative.
+    
+    Args:
+        ad_id: Meta Ads ad ID
+        access_token: Meta API access token
+    
+    Returns:
+        Dictionary with account_id, image_hashes and image_url, or an "error" key
+    """
+    creative = await _resolve_ad_creative(ad_id, access_token)
+    if "error" in creative:
+        return creative
+    
+    account_id = creative["account_id"]
+    if not account_id:
+        return {"error": "No account ID found for ad"}
+    
+    image_hashes = creative["image_hashes"]
+    if not image_hashes:
+        return {"error": "No image hashes found in creative"}
+    
+    print(f"Found image hashes: {image_hashes}")
+    
+    lookup = await _get_image_url(account_id, image_hashes, access_token)
+    if "error" in lookup:
+        return lookup
+    
+    return {
+        "account_id": account_id,
+        "image_hashes": image_hashes,
+        "image_url": lookup["image_url"]
+    }
+
+
+@mcp_server.tool()
+@meta_api_tool
+async def get_ad_image(access_token: str = None, ad_id: str = None, max_dim: int = 1024, quality: int = 85) -> Image:
+    """
+    Get, download, and visualize a Meta ad image in one step. Useful to see the image in the LLM.
+    
+    Args:
+        access_token: Meta API access token (optional - will use cached token if not provided)
+        ad_id: Meta Ads ad ID
+        max_dim: Maximum width/height in pixels; larger images are downscaled (default: 1024)
+        quality: JPEG quality from 1-95 for the returned image (default: 85)
+    
+    Returns:
+        The ad image ready for direct visual analysis
+    """
+    if not ad_id:
+        return "Error: No ad ID provided"
+    
+    if max_dim < 1:
+        return "Error: max_dim must be at least 1"
+    
+    # Pillow accepts up to 95; clamping also keeps the cache key space small
+    quality = min(max(quality, 1), 95)
+        
+    print(f"Attempting to get and analyze creative image for ad {ad_id}")
+    
+    resolved = await _resolve_image_url(ad_id, access_token)
+    
+    if "error" in resolved:
+        return f"Error: {resolved['error']}"
+    
+    image_hash = resolved["image_hashes"][0]
+    cache_key = f"{image_hash}_{max_dim}_q{quality}"
     
+    # Image hashes are content-addressed, so a cached JPEG can be returned as is
+    cached_bytes = await asyncio.to_thread(read_cached_image, cache_key)
+    if cached_bytes:
+        logger.debug("Using cached image for hash %s", image_hash)
+        return Image(data=cached_bytes, format="jpeg")
+    
+    image_url = resolved["image_url"]
     print(f"Downloading image from URL: {image_url}")
     
     # Download the image
@@ -300,18 +471,32 @@ async def get_ad_image(access_token: str = None, ad_id: str = None) -> Image:
         return "Error: Failed to download image"
     
     try:
-        # Convert bytes to PIL Image
+        PILImage = _get_pil()
+        
+        # Convert bytes to PIL Image (this only parses the header until pixels are needed)
         img = PILImage.open(io.BytesIO(image_bytes))
         
+        # Small JPEGs already within bounds can be sent without a decode/encode cycle
+        if (image_bytes.startswith(b"\xff\xd8\xff")
+                and len(image_bytes) <= JPEG_PASSTHROUGH_MAX_BYTES
+                and max(img.size) <= max_dim):
+            await asyncio.to_thread(write_cached_image, cache_key, image_bytes)
+            return Image(data=image_bytes, format="jpeg")
+        
         # Convert to RGB if needed
         if img.mode != "RGB":
             img = img.convert("RGB")
+        
+        # Pixels beyond what the model can use only inflate the payload
+        img.thumbnail((max_dim, max_dim), PILImage.LANCZOS)
             
         # Create a byte stream of the image data
         byte_arr = io.BytesIO()
-        img.save(byte_arr, format="JPEG")
+        img.save(byte_arr, format="JPEG", quality=quality, optimize=True, progressive=True)
         img_bytes = byte_arr.getvalue()
         
+        await asyncio.to_thread(write_cached_image, cache_key, img_bytes)
+        
         # Return as an Image object that LLM can directly analyze
         return Image(data=img_bytes, format="jpeg")
         
@@ -334,115 +519,51 @@ async def save_ad_image_locally(access_token: str = None, ad_id: str = None, out
         The file path to the saved image, or an error message string.
     """
     if not ad_id:
-        return json.dumps({"error": "No ad ID provided"}, indent=2)
+        return json_dumps({"error": "No ad ID provided"})
         
     print(f"Attempting to get and save creative image for ad {ad_id}")
     
-    # First, get creative and account IDs
-    ad_endpoint = f"{ad_id}"
-    ad_params = {
-        "fields": "creative{id},account_id"
-    }
-    
-    ad_data = await make_api_request(ad_endpoint, access_token, ad_params)
+    resolved = await _resolve_image_url(ad_id, access_token)
     
-    if "error" in ad_data:
-        return json.dumps({"error": f"Could not get ad data - {json.dumps(ad_data)}"}, indent=2)
+    if "error" in resolved:
+        return json_dumps({"error": resolved["error"]})
     
-    account_id = ad_data.get("account_id")
-    if not account_id:
-        return json.dumps({"error": "No account ID found for ad"}, indent=2)
+    image_url = resolved["image_url"]
+    image_hashes = resolved["image_hashes"]
     
-    if "creative" not in ad_data:
-        return json.dumps({"error": "No creative found for this ad"}, indent=2)
-        
-    creative_data = ad_data.get("creative", {})
-    creative_id = creative_data.get("id")
-    if not creative_id:
-        return json.dumps({"error": "No creative ID found"}, indent=2)
-    
-    # Get creative details to find image hash
-    creative_endpoint = f"{creative_id}"
-    creative_params = {
-        "fields": "id,name,image_hash,asset_feed_spec"
-    }
-    creative_details = await make_api_request(creative_endpoint, access_token, creative_params)
-    
-    image_hashes = []
-    if "image_hash" in creative_details:
-        image_hashes.append(creative_details["image_hash"])
-    if "asset_feed_spec" in creative_details and "images" in creative_details["asset_feed_spec"]:
-        for image in creative_details["asset_feed_spec"]["images"]:
-            if "hash" in image:
-                image_hashes.append(image["hash"])
-    
-    if not image_hashes:
-        # Fallback attempt (as in get_ad_image)
-        creative_json = await get_ad_creatives(ad_id=ad_id, access_token=access_token) # Ensure ad_id is passed correctly
-        creative_data_list = json.loads(creative_json)
-        if 'data' in creative_data_list and creative_data_list['data']:
-             first_creative = creative_data_list['data'][0]
-             if 'object_story_spec' in first_creative and 'link_data' in first_creative['object_story_spec'] and 'image_hash' in first_creative['object_story_spec']['link_data']:
-                 image_hashes.append(first_creative['object_story_spec']['link_data']['image_hash'])
-             elif 'image_hash' in first_creative: # Check direct hash on creative data
-                  image_hashes.append(first_creative['image_hash'])
-
-
-    if not image_hashes:
-        return json.dumps({"error": "No image hashes found in creative or fallback"}, indent=2)
-
-    print(f"Found image hashes: {image_hashes}")
-    
-    # Fetch image data using the first hash
-    image_endpoint = f"act_{account_id}/adimages"
-    hashes_str = f'["{image_hashes[0]}"]'
-    image_params = {
-        "fields": "hash,url,width,height,name,status",
-        "hashes": hashes_str
-    }
-    
-    print(f"Requesting image data with params: {image_params}")
-    image_data = await make_api_request(image_endpoint, access_token, image_params)
-    
-    if "error" in image_data:
-        return json.dumps({"error": f"Failed to get image data - {json.dumps(image_data)}"}, indent=2)
+    # Create a filename (e.g., using ad_id and image hash)
+    file_stem = os.path.join(output_dir, f"{ad_id}_{image_hashes[0]}")
     
-    if "data" not in image_data or not image_data["data"]:
-        return json.dumps({"error": "No image data returned from API"}, indent=2)
-        
-    first_image = image_data["data"][0]
-    image_url = first_image.get("url")
+    # The hash identifies the image content, so an existing file is already up to date
+    for _, file_extension in _IMAGE_SIGNATURES:
+        filepath = file_stem + file_extension
+        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+            logger.debug("Image already saved at: %s", filepath)
+            return json_dumps({"filepath": filepath})
     
-    if not image_url:
-        return json.dumps({"error": "No valid image URL found in API response"}, indent=2)
-        
     print(f"Downloading image from URL: {image_url}")
     
     # Download and Save Image
     image_bytes = await download_image(image_url)
     
     if not image_bytes:
-        return json.dumps({"error": "Failed to download image"}, indent=2)
+        return json_dumps({"error": "Failed to download image"})
         
     try:
         # Ensure output directory exists
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        # Create a filename (e.g., using ad_id and image hash)
-        file_extension = ".jpg" # Default extension, could try to infer from headers later
-        filename = f"{ad_id}_{image_hashes[0]}{file_extension}"
-        filepath = os.path.join(output_dir, filename)
-        
-        # Save the image bytes to the file
-        with open(filepath, "wb") as f:
-            f.write(image_bytes)
+        await asyncio.to_thread(os.makedirs, output_dir, exist_ok=True)
+        
+        # Name the file after the format actually downloaded
+        filepath = file_stem + _image_extension(image_bytes)
+        
+        # Save the image bytes to the file off the event loop
+        await asyncio.to_thread(_write_file, filepath, image_bytes)
             
         print(f"Image saved successfully to: {filepath}")
-        return json.dumps({"filepath": filepath}, indent=2) # Return JSON with filepath
+        return json_dumps({"filepath": filepath}) # Return JSON with filepath
 
     except Exception as e:
-        return json.dumps({"error": f"Failed to save image: {str(e)}"}, indent=2)
+        return json_dumps({"error": f"Failed to save image: {str(e)}"})
 
 
 @mcp_server.tool()
@@ -465,7 +586,7 @@ async def update_ad(
         access_token: Meta API access token (optional - will use cached token if not provided)
     """
     if not ad_id:
-        return json.dumps({"error": "Ad ID is required"}, indent=2)
+        return json_dumps({"error": "Ad ID is required"})
 
     params = {}
     if status:
@@ -474,15 +595,18 @@ async def update_ad(
         # Ensure bid_amount is sent as a string if it's not null
         params["bid_amount"] = str(bid_amount)
     if tracking_specs is not None: # Add tracking_specs to params if provided
-        params["tracking_specs"] = json.dumps(tracking_specs) # Needs to be JSON encoded string
+        params["tracking_specs"] = orjson.dumps(tracking_specs).decode() # Needs to be JSON encoded string
 
     if not params:
-        return json.dumps({"error": "No update parameters provided (status, bid_amount, or tracking_specs)"}, indent=2)
+        return json_dumps({"error": "No update parameters provided (status, bid_amount, or tracking_specs)"})
 
     endpoint = f"{ad_id}"
-    data = await make_api_request(endpoint, access_token, params, method='POST')
+    data = await make_api_request_with_backoff(endpoint, access_token, params, method='POST')
+    
+    # Drop cached image lookups so the next image fetch sees the updated ad
+    _ad_image_cache.pop(ad_id)
 
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -507,10 +631,10 @@ async def upload_ad_image(
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     if not image_path:
-        return json.dumps({"error": "No image path provided"}, indent=2)
+        return json_dumps({"error": "No image path provided"})
     
     # Ensure account_id has the 'act_' prefix for API compatibility
     if not account_id.startswith("act_"):
@@ -518,13 +642,9 @@ async def upload_ad_image(
     
     # Check if image file exists
     if not os.path.exists(image_path):
-        return json.dumps({"error": f"Image file not found: {image_path}"}, indent=2)
+        return json_dumps({"error": f"Image file not found: {image_path}"})
     
     try:
-        # Read image file
-        with open(image_path, "rb") as img_file:
-            image_bytes = img_file.read()
-        
         # Get image filename if name not provided
         if not name:
             name = os.path.basename(image_path)
@@ -532,27 +652,34 @@ async def upload_ad_image(
         # Prepare the API endpoint for uploading images
         endpoint = f"{account_id}/adimages"
         
-        # We need to convert the binary data to base64 for API upload
-        import base64
-        encoded_image = base64.b64encode(image_bytes).decode('utf-8')
+        # Meta returns the same image hash for identical bytes, so re-uploads can be skipped
+        file_hash = await asyncio.to_thread(_hash_file, image_path)
+        upload_key = (account_id, file_hash, name)
+        cached_upload = _uploaded_images.get(upload_key)
+        if cached_upload:
+            logger.debug("Image %s was already uploaded to %s, reusing result", image_path, account_id)
+            return json_dumps(cached_upload)
         
-        # Prepare POST parameters
-        params = {
-            "bytes": encoded_image,
-            "name": name
-        }
+        content_type = mimetypes.guess_type(image_path)[0] or "application/octet-stream"
+        
+        # Upload as multipart so the file is streamed rather than base64-encoded in memory
+        with open(image_path, "rb") as img_file:
+            files = {"filename": (name, img_file, content_type)}
+            
+            # Make API request to upload the image
+            print(f"Uploading image to Facebook Ad Account {account_id}")
+            data = await make_api_request_with_backoff(endpoint, access_token, {"name": name}, method="POST", files=files)
         
-        # Make API request to upload the image
-        print(f"Uploading image to Facebook Ad Account {account_id}")
-        data = await make_api_request(endpoint, access_token, params, method="POST")
+        if "error" not in data:
+            _uploaded_images.set(upload_key, data)
         
-        return json.dumps(data, indent=2)
+        return json_dumps(data)
     
     except Exception as e:
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to upload image",
             "details": str(e)
-        }, indent=2)
+        })
 
 
 @mcp_server.tool()
@@ -591,10 +718,10 @@ async def create_ad_creative(
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     if not image_hash:
-        return json.dumps({"error": "No image hash provided"}, indent=2)
+        return json_dumps({"error": "No image hash provided"})
     
     if not name:
         name = f"Creative {int(time.time())}"
@@ -613,50 +740,43 @@ async def create_ad_creative(
                 "limit": 1 
             }
             
-            pages_data = await make_api_request(pages_endpoint, access_token, pages_params)
+            pages_data = await make_api_request_with_backoff(pages_endpoint, access_token, pages_params)
             
             if "data" in pages_data and pages_data["data"]:
                 page_id = pages_data["data"][0]["id"]
                 print(f"Using page ID: {page_id} ({pages_data['data'][0].get('name', 'Unknown')})")
             else:
-                return json.dumps({
+                return json_dumps({
                     "error": "No page ID provided and no pages found for this account",
                     "suggestion": "Please provide a page_id parameter"
-                }, indent=2)
+                })
         except Exception as e:
-            return json.dumps({
+            return json_dumps({
                 "error": "Error finding page for account",
                 "details": str(e),
                 "suggestion": "Please provide a page_id parameter"
-            }, indent=2)
+            })
+    
+    # Prepare the creative data, leaving out optional fields that weren't provided
+    link_data = {
+        "image_hash": image_hash,
+        "link": link_url if link_url else "https://facebook.com",
+        "message": message,
+        "name": headline,
+        "description": description,
+        "call_to_action": {"type": call_to_action_type} if call_to_action_type else None
+    }
+    object_story_spec = {
+        "page_id": page_id,
+        "link_data": {key: value for key, value in link_data.items() if value}
+    }
     
-    # Prepare the creative data
+    # Encode the nested spec once here rather than in the generic POST preparation
     creative_data = {
         "name": name,
-        "object_story_spec": {
-            "page_id": page_id,
-            "link_data": {
-                "image_hash": image_hash,
-                "link": link_url if link_url else "https://facebook.com"
-            }
-        }
+        "object_story_spec": orjson.dumps(object_story_spec).decode()
     }
     
-    # Add optional parameters if provided
-    if message:
-        creative_data["object_story_spec"]["link_data"]["message"] = message
-    
-    if headline:
-        creative_data["object_story_spec"]["link_data"]["name"] = headline
-        
-    if description:
-        creative_data["object_story_spec"]["link_data"]["description"] = description
-    
-    if call_to_action_type:
-        creative_data["object_story_spec"]["link_data"]["call_to_action"] = {
-            "type": call_to_action_type
-        }
-    
     if instagram_actor_id:
         creative_data["instagram_actor_id"] = instagram_actor_id
     
@@ -665,31 +785,67 @@ async def create_ad_creative(
     
     try:
         # Make API request to create the creative
-        data = await make_api_request(endpoint, access_token, creative_data, method="POST")
+        data = await make_api_request_with_backoff(endpoint, access_token, creative_data, method="POST")
         
         # If successful, get more details about the created creative
         if "id" in data:
             creative_id = data["id"]
             creative_endpoint = f"{creative_id}"
             creative_params = {
-                "fields": "id,name,status,thumbnail_url,image_url,image_hash,object_story_spec,url_tags,link_url"
+                "fields": _CREATED_CREATIVE_FIELDS
             }
             
-            creative_details = await make_api_request(creative_endpoint, access_token, creative_params)
-            return json.dumps({
+            creative_details = await make_api_request_with_backoff(creative_endpoint, access_token, creative_params)
+            return json_dumps({
                 "success": True,
                 "creative_id": creative_id,
                 "details": creative_details
-            }, indent=2)
+            })
         
-        return json.dumps(data, indent=2)
+        return json_dumps(data)
     
     except Exception as e:
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to create ad creative",
             "details": str(e),
             "creative_data_sent": creative_data
-        }, indent=2)
+        })
+
+
+async def _get_pages_by_id(page_ids: set, access_token: str) -> List[Dict[str, Any]]:
+    """
+    Fetch page details for a set of page IDs using Graph multi-ID lookups.
+    
+    Args:
+        page_ids: Page IDs to look up
+        access_token: Meta API access token
+    
+    Returns:
+        List of page detail dictionaries for the pages that could be read
+    """
+    page_ids = sorted(page_ids)
+    
+    async def fetch_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+        params = {
+            "ids": ",".join(chunk),
+            "fields": _PAGE_FIELDS
+        }
+        page_data = await make_api_request_with_backoff("", access_token, params)
+        
+        if "error" not in page_data:
+            return [page for page in page_data.values() if isinstance(page, dict) and "id" in page]
+        
+        # One unreadable page fails the whole multi-ID request, so fall back to
+        # per-page lookups sent together as a single batch
+        query = urlencode({"fields": _PAGE_FIELDS})
+        results = await make_batch_api_request(access_token, [
+            {"method": "GET", "relative_url": f"{page_id}?{query}"} for page_id in chunk
+        ])
+        return [page for page in results if "id" in page]
+    
+    # The ids parameter accepts at most 50 IDs per request; chunks run concurrently
+    chunks = await asyncio.gather(*(fetch_chunk(page_ids[i:i + 50]) for i in range(0, len(page_ids), 50)))
+    return [page for chunk in chunks for page in chunk]
 
 
 @mcp_server.tool()
@@ -707,23 +863,23 @@ async def get_account_pages(access_token: str = None, account_id: str = None) ->
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     # Handle special case for 'me'
     if account_id == "me":
         try:
             endpoint = "me/accounts"
             params = {
-                "fields": "id,name,username,category,fan_count,link,verification_status,picture"
+                "fields": _PAGE_FIELDS
             }
             
-            user_pages_data = await make_api_request(endpoint, access_token, params)
-            return json.dumps(user_pages_data, indent=2)
+            user_pages_data = await make_api_request_with_backoff(endpoint, access_token, params)
+            return json_dumps(user_pages_data)
         except Exception as e:
-            return json.dumps({
+            return json_dumps({
                 "error": "Failed to get user pages",
                 "details": str(e)
-            }, indent=2)
+            })
     
     # Ensure account_id has the 'act_' prefix for regular accounts
     if not account_id.startswith("act_"):
@@ -739,42 +895,30 @@ async def get_account_pages(access_token: str = None, account_id: str = None) ->
             "limit": 100
         }
         
-        ads_data = await make_api_request(endpoint, access_token, params)
+        ads_data = await make_api_request_with_backoff(endpoint, access_token, params)
         
         # Extract unique page IDs from ads
-        page_ids = set()
-        if "data" in ads_data:
-            for ad in ads_data.get("data", []):
-                if "creative" in ad and "creative" in ad and "object_story_spec" in ad["creative"] and "page_id" in ad["creative"]["object_story_spec"]:
-                    page_ids.add(ad["creative"]["object_story_spec"]["page_id"])
+        page_ids = {
+            page_id for ad in ads_data.get("data", [])
+            if (page_id := _dig(ad, "creative", "object_story_spec", "page_id"))
+        }
         
         # If we found page IDs, get details for each
         if page_ids:
-            page_details = {"data": []}
-            
-            for page_id in page_ids:
-                page_endpoint = f"{page_id}"
-                page_params = {
-                    "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-                }
-                
-                page_data = await make_api_request(page_endpoint, access_token, page_params)
-                if "id" in page_data:
-                    page_details["data"].append(page_data)
-            
-            if page_details["data"]:
-                return json.dumps(page_details, indent=2)
+            pages = await _get_pages_by_id(page_ids, access_token)
+            if pages:
+                return json_dumps({"data": pages})
         
         # Approach 2: Try client_pages endpoint
         endpoint = f"{account_id}/client_pages"
         params = {
-            "fields": "id,name,username,category,fan_count,link,verification_status,picture"
+            "fields": _PAGE_FIELDS
         }
         
-        client_pages_data = await make_api_request(endpoint, access_token, params)
+        client_pages_data = await make_api_request_with_backoff(endpoint, access_token, params)
         
         if "data" in client_pages_data and client_pages_data["data"]:
-            return json.dumps(client_pages_data, indent=2)
+            return json_dumps(client_pages_data)
         
         # Approach 3: Try promoted_objects endpoint to find page IDs
         endpoint = f"{account_id}/promoted_objects"
@@ -782,38 +926,27 @@ async def get_account_pages(access_token: str = None, account_id: str = None) ->
             "fields": "page_id"
         }
         
-        promoted_objects_data = await make_api_request(endpoint, access_token, params)
+        promoted_objects_data = await make_api_request_with_backoff(endpoint, access_token, params)
         
-        if "data" in promoted_objects_data and promoted_objects_data["data"]:
-            page_ids = set()
-            for obj in promoted_objects_data["data"]:
-                if "page_id" in obj:
-                    page_ids.add(obj["page_id"])
-            
-            if page_ids:
-                page_details = {"data": []}
-                for page_id in page_ids:
-                    page_endpoint = f"{page_id}"
-                    page_params = {
-                        "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-                    }
-                    
-                    page_data = await make_api_request(page_endpoint, access_token, page_params)
-                    if "id" in page_data:
-                        page_details["data"].append(page_data)
-                
-                if page_details["data"]:
-                    return json.dumps(page_details, indent=2)
+        # Skip pages already looked up from the ads above
+        promoted_page_ids = {
+            obj["page_id"] for obj in promoted_objects_data.get("data", []) if "page_id" in obj
+        } - page_ids
+        
+        if promoted_page_ids:
+            pages = await _get_pages_by_id(promoted_page_ids, access_token)
+            if pages:
+                return json_dumps({"data": pages})
         
         # If all approaches failed, return empty data with a message
-        return json.dumps({
+        return json_dumps({
             "data": [],
             "message": "No pages found associated with this account",
             "suggestion": "You may need to create a page or provide a page_id explicitly when creating ads"
-        }, indent=2)
+        })
         
     except Exception as e:
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to get account pages",
             "details": str(e)
-        }, indent=2)
\ No newline at end of file
+        })
\ No newline at end of file
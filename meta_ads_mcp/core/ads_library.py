@@ -1,9 +1,35 @@
 """Adds Library-related functionality for Meta Ads API."""
 
-import json
-from typing import Optional, List, Dict, Any
-from .api import meta_api_tool, make_api_request
+import orjson
+import functools
+from typing import Optional, List, Dict, Any, Tuple
+from .api import meta_api_tool, make_api_request_with_backoff
 from .server import mcp_server
+from .utils import json_dumps
+
+
+@functools.lru_cache(maxsize=256)
+def _build_archive_params(
+    search_terms: str,
+    ad_type: str,
+    ad_reached_countries: Tuple[str, ...],
+    limit: int,
+    fields: str
+) -> Tuple[Tuple[str, Any], ...]:
+    """Build ads_archive query params, memoized so repeated searches skip re-encoding"""
+    # API expects a JSON array string; plain country codes need no escaping, so join them directly
+    if all(isinstance(code, str) and code.isascii() and code.isalnum() for code in ad_reached_countries):
+        countries = '["' + '","'.join(ad_reached_countries) + '"]' if ad_reached_countries else "[]"
+    else:
+        countries = orjson.dumps(list(ad_reached_countries)).decode()
+    
+    return (
+        ("search_terms", search_terms),
+        ("ad_type", ad_type),
+        ("ad_reached_countries", countries),
+        ("limit", limit),
+        ("fields", fields),
+    )
 
 
 @mcp_server.tool()
@@ -41,29 +67,28 @@ async def search_ads_archive(
         pass
 
     if not search_terms:
-        return json.dumps({"error": "search_terms parameter is required"}, indent=2)
+        return json_dumps({"error": "search_terms parameter is required"})
 
     if not ad_reached_countries:
-        return json.dumps({"error": "ad_reached_countries parameter is required"}, indent=2)
+        return json_dumps({"error": "ad_reached_countries parameter is required"})
+
+    # A single country code may arrive as a bare string; don't split it into characters
+    if isinstance(ad_reached_countries, str):
+        ad_reached_countries = [ad_reached_countries]
 
     endpoint = "ads_archive"
-    params = {
-        "search_terms": search_terms,
-        "ad_type": ad_type,
-        "ad_reached_countries": json.dumps(ad_reached_countries), # API expects a JSON array string
-        "limit": limit,
-        "fields": fields,
-    }
+    # Build a fresh dict from the cached pairs for this request
+    params = dict(_build_archive_params(search_terms, ad_type, tuple(ad_reached_countries), limit, fields))
 
     try:
-        data = await make_api_request(endpoint, access_token, params, method="GET")
-        return json.dumps(data, indent=2)
+        data = await make_api_request_with_backoff(endpoint, access_token, params, method="GET")
+        return json_dumps(data)
     except Exception as e:
         error_msg = str(e)
         # Consider logging the full error for debugging
         # print(f"Error calling Ads Library API: {error_msg}")
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to search ads archive",
             "details": error_msg,
             "params_sent": {k: v for k, v in params.items() if k != 'access_token'} # Avoid logging token
-        }, indent=2) 
\ No newline at end of file
+        }) 
\ No newline at end of file
@@ -1,13 +1,38 @@
 """Ad Set-related functionality for Meta Ads API."""
 
-import json
+import orjson
 from typing import Optional, Dict, Any, List
-from .api import meta_api_tool, make_api_request
-from .accounts import get_ad_accounts
+from .api import meta_api_tool, make_api_request_with_backoff, make_batch_api_request
+from .accounts import _get_ad_accounts
 from .server import mcp_server
+from .utils import json_dumps
 import asyncio
 from .callback_server import start_callback_server, shutdown_callback_server, update_confirmation
-import urllib.parse
+from urllib.parse import urlencode
+
+# Graph API field selections shared across the ad set tools
+_ADSET_FIELDS = "id,name,campaign_id,status,daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,frequency_control_specs{event,interval_days,max_frequency}"
+# Detail view puts frequency_control_specs first and adds delivery settings
+_ADSET_DETAIL_FIELDS = "id,name,campaign_id,status,frequency_control_specs{event,interval_days,max_frequency},daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,attribution_spec,destination_type,promoted_object,pacing_type,budget_remaining"
+
+# Targeting used by create_adset when none is given; only ever serialized, never mutated
+_DEFAULT_TARGETING = {
+    "age_min": 18,
+    "age_max": 65,
+    "geo_locations": {"countries": ["US"]},
+    "targeting_automation": {"advantage_audience": 1}
+}
+
+# Largest page size requested from the adsets edge. Ad sets carry full targeting
+# specs, so bigger limits are paged with cursors to keep each response small.
+MAX_ADSETS_PAGE_SIZE = 100
+
+# The Graph API ids parameter accepts at most 50 IDs per request
+MAX_IDS_PER_REQUEST = 50
+
+# Bound format methods for the confirmation link built on every update_adset call
+_CONFIRM_URL_TEMPLATE = "http://localhost:{port}/confirm-update?{query}".format
+_MARKDOWN_LINK_TEMPLATE = "[Click here to confirm ad set update]({})".format
 
 
 @mcp_server.tool()
@@ -24,34 +49,75 @@ async def get_adsets(access_token: str = None, account_id: str = None, limit: in
     """
     # If no account ID is specified, try to get the first one for the user
     if not account_id:
-        accounts_json = await get_ad_accounts("me", json.dumps({"limit": 1}), access_token)
-        accounts_data = json.loads(accounts_json)
+        # Only the first account's ID is needed
+        accounts_data = await _get_ad_accounts(access_token, "me", 1, fields="id")
         
         if "data" in accounts_data and accounts_data["data"]:
             account_id = accounts_data["data"][0]["id"]
         else:
-            return json.dumps({"error": "No account ID specified and no accounts found for user"}, indent=2)
+            return json_dumps({"error": "No account ID specified and no accounts found for user"})
     
-    # Change endpoint based on whether campaign_id is provided
-    if campaign_id:
-        endpoint = f"{campaign_id}/adsets"
-        params = {
-            "fields": "id,name,campaign_id,status,daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,frequency_control_specs{event,interval_days,max_frequency}",
-            "limit": limit
-        }
-    else:
-        # Use account endpoint if no campaign_id is given
-        endpoint = f"{account_id}/adsets"
+    # Change endpoint based on whether campaign_id is provided; use the account endpoint otherwise
+    endpoint = f"{campaign_id}/adsets" if campaign_id else f"{account_id}/adsets"
+    
+    adsets = []
+    data = {}
+    after = None
+    while len(adsets) < limit:
         params = {
-            "fields": "id,name,campaign_id,status,daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,frequency_control_specs{event,interval_days,max_frequency}",
-            "limit": limit
+            "fields": _ADSET_FIELDS,
+            "limit": min(limit - len(adsets), MAX_ADSETS_PAGE_SIZE)
         }
-        # Note: Removed the attempt to add campaign_id to params for the account endpoint case, 
-        # as it was ineffective and the logic now uses the correct endpoint for campaign filtering.
+        if after:
+            params["after"] = after
+        
+        data = await make_api_request_with_backoff(endpoint, access_token, params)
+        if "error" in data:
+            # Return what we have if a later page fails, otherwise the error
+            if not adsets:
+                return json_dumps(data)
+            break
+        
+        adsets.extend(data.get("data", []))
+        paging = data.get("paging", {})
+        after = paging.get("cursors", {}).get("after")
+        if not after or "next" not in paging:
+            break
+    
+    result = {"data": adsets[:limit]}
+    if "paging" in data:
+        result["paging"] = data["paging"]
+    return json_dumps(result)
+
+
+async def _get_adset_details(adset_id: str, access_token: str) -> Dict[str, Any]:
+    """
+    Fetch an ad set's details as a dictionary for internal callers.
+    
+    Args:
+        adset_id: Meta Ads ad set ID
+        access_token: Meta API access token
+    """
+    endpoint = f"{adset_id}"
+    # Explicitly prioritize frequency_control_specs in the fields request
+    params = {
+        "fields": _ADSET_DETAIL_FIELDS
+    }
+    
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
+    
+    return _note_missing_frequency_caps(data)
 
-    data = await make_api_request(endpoint, access_token, params)
+
+def _note_missing_frequency_caps(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Flag ad set details that came back without frequency_control_specs"""
+    # For debugging - check if frequency_control_specs was returned (errors have no fields to check)
+    if 'error' not in data and 'frequency_control_specs' not in data:
+        data['_meta'] = {
+            'note': 'No frequency_control_specs field was returned by the API. This means either no frequency caps are set or the API did not include this field in the response.'
+        }
     
-    return json.dumps(data, indent=2)
+    return data
 
 
 @mcp_server.tool()
@@ -71,23 +137,71 @@ async def get_adset_details(access_token: str = None, adset_id: str = None) -> s
         }
     """
     if not adset_id:
-        return json.dumps({"error": "No ad set ID provided"}, indent=2)
+        return json_dumps({"error": "No ad set ID provided"})
     
-    endpoint = f"{adset_id}"
-    # Explicitly prioritize frequency_control_specs in the fields request
-    params = {
-        "fields": "id,name,campaign_id,status,frequency_control_specs{event,interval_days,max_frequency},daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,attribution_spec,destination_type,promoted_object,pacing_type,budget_remaining"
-    }
+    data = await _get_adset_details(adset_id, access_token)
     
-    data = await make_api_request(endpoint, access_token, params)
+    return json_dumps(data)
+
+
+async def _get_adset_details_bulk(adset_ids: List[str], access_token: str) -> Dict[str, Any]:
+    """
+    Fetch details for many ad sets using Graph multi-ID lookups.
     
-    # For debugging - check if frequency_control_specs was returned
-    if 'frequency_control_specs' not in data:
-        data['_meta'] = {
-            'note': 'No frequency_control_specs field was returned by the API. This means either no frequency caps are set or the API did not include this field in the response.'
+    Args:
+        adset_ids: Meta Ads ad set IDs
+        access_token: Meta API access token
+    
+    Returns:
+        Dictionary mapping each ad set ID to its details, or to an error object
+        if that ad set could not be read
+    """
+    adset_ids = list(dict.fromkeys(adset_ids))
+    chunks = [adset_ids[i:i + MAX_IDS_PER_REQUEST] for i in range(0, len(adset_ids), MAX_IDS_PER_REQUEST)]
+    
+    async def fetch_chunk(chunk: List[str]) -> Dict[str, Any]:
+        params = {
+            "ids": ",".join(chunk),
+            "fields": _ADSET_DETAIL_FIELDS
         }
+        data = await make_api_request_with_backoff("", access_token, params)
+        if "error" not in data:
+            return {adset_id: _note_missing_frequency_caps(details) for adset_id, details in data.items()}
+        
+        # One unreadable ad set fails the whole multi-ID request, so fall back to
+        # per-ad set lookups sent together as a single batch
+        query = urlencode({"fields": _ADSET_DETAIL_FIELDS})
+        details = await make_batch_api_request(access_token, [
+            {"method": "GET", "relative_url": f"{adset_id}?{query}"} for adset_id in chunk
+        ])
+        return {adset_id: _note_missing_frequency_caps(data) for adset_id, data in zip(chunk, details)}
+    
+    results = {}
+    for chunk_data in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        results.update(chunk_data)
+    return results
+
+
+@mcp_server.tool()
+@meta_api_tool
+async def get_adset_details_bulk(access_token: str = None, adset_ids: List[str] = None) -> str:
+    """
+    Get detailed information about multiple ad sets in as few requests as possible.
     
-    return json.dumps(data, indent=2)
+    Args:
+        adset_ids: List of Meta Ads ad set IDs (required)
+        access_token: Meta API access token (optional - will use cached token if not provided)
+    """
+    if not adset_ids:
+        return json_dumps({"error": "No ad set IDs provided"})
+    
+    # Accept a single ID passed as a plain string
+    if isinstance(adset_ids, str):
+        adset_ids = [adset_ids]
+    
+    data = await _get_adset_details_bulk(adset_ids, access_token)
+    
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -130,28 +244,23 @@ async def create_adset(
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     if not campaign_id:
-        return json.dumps({"error": "No campaign ID provided"}, indent=2)
+        return json_dumps({"error": "No campaign ID provided"})
     
     if not name:
-        return json.dumps({"error": "No ad set name provided"}, indent=2)
+        return json_dumps({"error": "No ad set name provided"})
     
     if not optimization_goal:
-        return json.dumps({"error": "No optimization goal provided"}, indent=2)
+        return json_dumps({"error": "No optimization goal provided"})
     
     if not billing_event:
-        return json.dumps({"error": "No billing event provided"}, indent=2)
+        return json_dumps({"error": "No billing event provided"})
     
     # Basic targeting is required if not provided
     if not targeting:
-        targeting = {
-            "age_min": 18,
-            "age_max": 65,
-            "geo_locations": {"countries": ["US"]},
-            "targeting_automation": {"advantage_audience": 1}
-        }
+        targeting = _DEFAULT_TARGETING
     
     endpoint = f"{account_id}/adsets"
     
@@ -161,7 +270,7 @@ async def create_adset(
         "status": status,
         "optimization_goal": optimization_goal,
         "billing_event": billing_event,
-        "targeting": json.dumps(targeting)  # Properly format as JSON string
+        "targeting": orjson.dumps(targeting).decode()  # Properly format as JSON string
     }
     
     # Convert budget values to strings if they aren't already
@@ -185,22 +294,23 @@ async def create_adset(
         params["end_time"] = end_time
     
     try:
-        data = await make_api_request(endpoint, access_token, params, method="POST")
-        return json.dumps(data, indent=2)
+        data = await make_api_request_with_backoff(endpoint, access_token, params, method="POST")
+        return json_dumps(data)
     except Exception as e:
         error_msg = str(e)
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to create ad set",
             "details": error_msg,
             "params_sent": params
-        }, indent=2)
+        })
 
 
 @mcp_server.tool()
 @meta_api_tool
 async def update_adset(adset_id: str, frequency_control_specs: List[Dict[str, Any]] = None, bid_strategy: str = None, 
                         bid_amount: int = None, status: str = None, targeting: Dict[str, Any] = None, 
-                        optimization_goal: str = None, access_token: str = None) -> str:
+                        optimization_goal: str = None, include_current_details: bool = False,
+                        access_token: str = None) -> str:
     """
     Update an ad set with new settings including frequency caps.
     
@@ -214,37 +324,53 @@ async def update_adset(adset_id: str, frequency_control_specs: List[Dict[str, An
         targeting: Targeting specifications including targeting_automation
                   (e.g. {"targeting_automation":{"advantage_audience":1}})
         optimization_goal: Conversion optimization goal (e.g., 'LINK_CLICKS', 'CONVERSIONS', 'APP_INSTALLS', etc.)
+        include_current_details: Fetch the ad set's current settings for the response even when
+                                 the update doesn't need them (default: False)
         access_token: Meta API access token (optional - will use cached token if not provided)
     """
     if not adset_id:
-        return json.dumps({"error": "No ad set ID provided"}, indent=2)
+        return json_dumps({"error": "No ad set ID provided"})
+    
+    changes = {
+        key: value for key, value in (
+            ('frequency_control_specs', frequency_control_specs),
+            ('bid_strategy', bid_strategy),
+            ('bid_amount', bid_amount),
+            ('status', status),
+            ('optimization_goal', optimization_goal),
+        ) if value is not None
+    }
     
-    changes = {}
+    if not changes and targeting is None:
+        return json_dumps({"error": "No update parameters provided"})
+    
+    # Current details are only needed to merge targeting_automation into the
+    # existing targeting, or when the caller asks for them; the confirmation
+    # page fetches its own copy. Starting the callback server (if not already
+    # running) blocks on a socket bind, so it runs in a worker thread
+    # overlapping the Graph request.
+    merge_targeting = targeting is not None and 'targeting_automation' in targeting
+    current_details = None
+    if include_current_details or merge_targeting:
+        current_details, port = await asyncio.gather(
+            _get_adset_details(adset_id, access_token),
+            asyncio.to_thread(start_callback_server)
+        )
+    else:
+        port = await asyncio.to_thread(start_callback_server)
     
-    if frequency_control_specs is not None:
-        changes['frequency_control_specs'] = frequency_control_specs
+    # Never build a targeting write without the live targeting to merge into
+    if merge_targeting and 'error' in current_details:
+        return json_dumps({
+            "error": "Failed to fetch the ad set's current targeting to merge targeting_automation into",
+            "details": current_details["error"]
+        })
     
-    if bid_strategy is not None:
-        changes['bid_strategy'] = bid_strategy
-        
-    if bid_amount is not None:
-        changes['bid_amount'] = bid_amount
-        
-    if status is not None:
-        changes['status'] = status
-        
-    if optimization_goal is not None:
-        changes['optimization_goal'] = optimization_goal
-        
     if targeting is not None:
-        # Get current ad set details to preserve existing targeting settings
-        current_details_json = await get_adset_details(adset_id=adset_id, access_token=access_token)
-        current_details = json.loads(current_details_json)
-        
-        # Check if the current ad set has targeting information
-        current_targeting = current_details.get('targeting', {})
-        
-        if 'targeting_automation' in targeting:
+        if merge_targeting:
+            # Check if the current ad set has targeting information
+            current_targeting = current_details.get('targeting', {})
+            
             # Only update targeting_automation while preserving other targeting settings
             if current_targeting:
                 merged_targeting = current_targeting.copy()
@@ -262,20 +388,10 @@ async def update_adset(adset_id: str, frequency_control_specs: List[Dict[str, An
             # Full targeting replacement
             changes['targeting'] = targeting
     
-    if not changes:
-        return json.dumps({"error": "No update parameters provided"}, indent=2)
-    
-    # Get current ad set details for comparison
-    current_details_json = await get_adset_details(adset_id=adset_id, access_token=access_token)
-    current_details = json.loads(current_details_json)
-    
-    # Start the callback server if not already running
-    port = start_callback_server()
-    
-    # Generate confirmation URL with properly encoded parameters
-    changes_json = json.dumps(changes)
-    encoded_changes = urllib.parse.quote(changes_json)
-    confirmation_url = f"http://localhost:{port}/confirm-update?adset_id={adset_id}&token={access_token}&changes={encoded_changes}"
+    # Generate confirmation URL with every parameter encoded in one pass
+    changes_json = orjson.dumps(changes).decode()
+    query_string = urlencode({"adset_id": adset_id, "token": access_token, "changes": changes_json})
+    confirmation_url = _CONFIRM_URL_TEMPLATE(port=port, query=query_string)
     
     # Reset the update confirmation
     update_confirmation.clear()
@@ -285,11 +401,13 @@ async def update_adset(adset_id: str, frequency_control_specs: List[Dict[str, An
     response = {
         "message": "Please confirm the ad set update",
         "confirmation_url": confirmation_url,
-        "markdown_link": f"[Click here to confirm ad set update]({confirmation_url})",
-        "current_details": current_details,
+        "markdown_link": _MARKDOWN_LINK_TEMPLATE(confirmation_url),
+        "current_details": current_details if current_details is not None else {
+            "note": "Not fetched for this update; the confirmation page shows the ad set's current settings."
+        },
         "proposed_changes": changes,
         "instructions_for_llm": "You must present this link as clickable Markdown to the user using the markdown_link format provided.",
         "note": "Click the link to confirm and apply your ad set updates. Refresh the browser page if it doesn't load immediately."
     }
     
-    return json.dumps(response, indent=2) 
\ No newline at end of file
+    return json_dumps(response) 
\ No newline at end of file
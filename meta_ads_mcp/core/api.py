@@ -1,24 +1,272 @@
 """Core API functionality for Meta Ads API."""
 
-from typing import Any, Dict, Optional, Callable
-import json
+from typing import Any, Dict, List, Optional, Callable
+import logging
 import httpx
 import asyncio
+import collections
+import copy
 import functools
+import hashlib
 import os
+import random
+import time
+import weakref
+import importlib.util
+from contextlib import asynccontextmanager
 from .auth import needs_authentication, get_current_access_token, auth_manager, start_callback_server, shutdown_callback_server
-from .utils import logger
+from .utils import logger, TTLCache, HTTP_TIMEOUT, json_dumps, json_loads, env_number
 
 # Constants
 META_GRAPH_API_VERSION = "v22.0"
 META_GRAPH_API_BASE = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}"
 USER_AGENT = "meta-ads-mcp/1.0"
 
+# Graph API error codes that signal throttling rather than a bad request
+RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613, 80004}
+# HTTP statuses that usually clear up on their own; only idempotent requests are retried on them
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+# Graph API error codes that mean the token or app credentials need attention
+_AUTH_ERROR_CODES = frozenset({190, 102, 4, 200, 10})
+# Subset of those that invalidate the cached token when raised as GraphAPIError
+_TOKEN_ERROR_CODES = frozenset({190, 102, 4})
+# Message Meta returns (with code 200) when the app ID is misconfigured
+_APP_ID_ERROR_MARK = "Provide valid app ID"
+# Most sub-requests Meta accepts in one /batch call
+MAX_BATCH_REQUESTS = 50
+# Longest single backoff sleep, in seconds
+MAX_BACKOFF_SECONDS = 60
+
+# Usage percentage (from Meta's usage headers) above which new requests are held back
+USAGE_THROTTLE_PERCENT = 90
+# Pause applied when usage is high but Meta gives no estimate of when it resets
+USAGE_THROTTLE_SECONDS = 5
+
+# Keep-alive pool shared by all Graph API calls on the server's event loop
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+
+# Settings applied to every Graph API client so requests don't repeat them per call;
+# requests pass the endpoint path, which httpx joins onto base_url
+_CLIENT_SETTINGS = {
+    "base_url": META_GRAPH_API_BASE,
+    "headers": {"User-Agent": USER_AGENT},
+    # Fail fast when graph.facebook.com can't be reached, but let slow reads finish
+    "timeout": HTTP_TIMEOUT
+}
+
+# Successful GET responses are reused briefly so repeated reads in an agent loop
+# don't each round-trip to Meta. Entries hold raw response bytes so callers always
+# get a fresh dict they're free to mutate.
+RESPONSE_CACHE_TTL_SECONDS = 30
+_response_cache = TTLCache(maxsize=512, ttl=RESPONSE_CACHE_TTL_SECONDS)
+# Futures for GET requests currently in flight, keyed by event loop and cache key
+_inflight_requests: Dict[tuple, asyncio.Future] = {}
+
+# Upper bound on in-flight Graph API requests per event loop, so concurrent
+# fan-outs (e.g. bulk lookups) overlap without triggering Meta's throttling.
+# The effective limit adapts between MIN_CONCURRENT_REQUESTS and this ceiling.
+MAX_CONCURRENT_REQUESTS = max(1, env_number("META_ADS_MAX_CONCURRENCY", 32, int))
+MIN_CONCURRENT_REQUESTS = min(2, MAX_CONCURRENT_REQUESTS)
+# Mean request latency above which concurrency is cut back. Insights queries
+# routinely take a few seconds, so this sits above a typical slow read.
+TARGET_REQUEST_LATENCY_SECONDS = 5.0
+
+# Monotonic deadlines before which requests should wait, keyed by "app" or ad account ID
+_throttle_until: Dict[str, float] = {}
+
+# Multiplex concurrent requests over one connection when the h2 package is
+# available (it ships with the httpx[http2] dependency)
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Attach raw response headers and request details to error results. Off by
+# default: they are rarely read, cost a copy per error and can include trace IDs.
+_INCLUDE_DEBUG_ON_ERROR = os.environ.get("META_ADS_MCP_DEBUG_RESPONSES") == "1"
+
+# httpx connections can't cross event loops, so keep one pooled client per loop
+# (the MCP server's loop and the callback server's handler loop)
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+@asynccontextmanager
+async def _graph_client():
+    """Yield the pooled httpx client for Graph API calls on the running loop"""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=HTTP2_ENABLED, limits=HTTP_LIMITS, **_CLIENT_SETTINGS)
+        _http_clients[loop] = client
+    yield client
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to how Meta is coping (AIMD).
+    
+    The limit grows additively while requests succeed within the target latency
+    and is halved on throttling, server errors or sustained slow responses.
+    """
+    def __init__(self, min_limit: int, max_limit: int, target_latency: float, window: int = 8):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.limit = float(max_limit)
+        self._in_flight = 0
+        self._latencies = collections.deque(maxlen=window)
+        self._condition = asyncio.Condition()
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one request slot, waiting while the current limit is reached"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+    
+    def record(self, latency: float, error: bool = False) -> None:
+        """Adjust the limit from a finished request's latency and outcome"""
+        self._latencies.append(latency)
+        slow = (len(self._latencies) == self._latencies.maxlen
+                and sum(self._latencies) / len(self._latencies) > self.target_latency)
+        
+        if error or slow:
+            self.limit = max(self.min_limit, self.limit / 2)
+            # Judge the new limit on fresh samples only
+            self._latencies.clear()
+            logger.debug("Reduced Graph API concurrency to %d", int(self.limit))
+        else:
+            self.limit = min(self.max_limit, self.limit + 0.5)
+
+
+# Limiters bind to the loop they first wait on, so keep one per loop
+_request_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AdaptiveConcurrency]" = weakref.WeakKeyDictionary()
+
+
+def _request_limiter() -> AdaptiveConcurrency:
+    """Get the limiter for concurrent Graph API requests on the running loop"""
+    loop = asyncio.get_running_loop()
+    limiter = _request_limiters.get(loop)
+    if limiter is None:
+        limiter = _request_limiters[loop] = AdaptiveConcurrency(
+            MIN_CONCURRENT_REQUESTS, MAX_CONCURRENT_REQUESTS, TARGET_REQUEST_LATENCY_SECONDS
+        )
+    return limiter
+
+
+def _usage_account_key(endpoint: str) -> Optional[str]:
+    """Get the ad account ID an endpoint belongs to, if it is addressed through one"""
+    account = endpoint.split("/", 1)[0]
+    return account if account.startswith("act_") else None
+
+
+def _parse_usage_header(value: Optional[str]) -> Any:
+    """Parse a JSON usage header, returning None if missing or malformed"""
+    if not value:
+        return None
+    try:
+        return json_loads(value)
+    except ValueError:
+        return None
+
+
+def _record_usage(endpoint: str, headers: httpx.Headers) -> None:
+    """
+    Read Meta's rate limit usage headers and schedule a pause when usage is near the limit.
+    
+    Args:
+        endpoint: API endpoint the response belongs to
+        headers: Response headers
+    """
+    now = time.monotonic()
+    
+    # App-level usage applies to every request
+    app_usage = _parse_usage_header(headers.get("x-app-usage"))
+    if isinstance(app_usage, dict):
+        usage = max((v for v in app_usage.values() if isinstance(v, (int, float))), default=0)
+        if usage > USAGE_THROTTLE_PERCENT:
+            logger.warning("App usage at %s%%; pausing Graph API requests for %ss", usage, USAGE_THROTTLE_SECONDS)
+            _throttle_until["app"] = max(_throttle_until.get("app", 0), now + USAGE_THROTTLE_SECONDS)
+    
+    account_key = _usage_account_key(endpoint)
+    if account_key is None:
+        return
+    
+    # Per-account usage: ad account usage reports seconds until reset,
+    # business use case usage reports minutes until access is regained
+    usage, pause = 0, 0
+    account_usage = _parse_usage_header(headers.get("x-ad-account-usage"))
+    if isinstance(account_usage, dict):
+        usage = account_usage.get("acc_id_util_pct") or 0
+        pause = account_usage.get("reset_time_duration") or 0
+    
+    buc_usage = _parse_usage_header(headers.get("x-business-use-case-usage"))
+    if isinstance(buc_usage, dict):
+        for entries in buc_usage.values():
+            for entry in entries if isinstance(entries, list) else ():
+                if not isinstance(entry, dict):
+                    continue
+                usage = max(usage, entry.get("call_count") or 0, entry.get("total_time") or 0, entry.get("total_cputime") or 0)
+                pause = max(pause, (entry.get("estimated_time_to_regain_access") or 0) * 60)
+    
+    if usage > USAGE_THROTTLE_PERCENT:
+        pause = min(pause or USAGE_THROTTLE_SECONDS, MAX_BACKOFF_SECONDS)
+        logger.warning("Usage for %s at %s%%; pausing its requests for %ss", account_key, usage, pause)
+        _throttle_until[account_key] = max(_throttle_until.get(account_key, 0), now + pause)
+
+
+async def _wait_for_usage_headroom(endpoint: str) -> None:
+    """Sleep until any usage pause affecting this endpoint has passed"""
+    deadline = _throttle_until.get("app", 0)
+    account_key = _usage_account_key(endpoint)
+    if account_key is not None:
+        deadline = max(deadline, _throttle_until.get(account_key, 0))
+    
+    delay = deadline - time.monotonic()
+    if delay > 0:
+        logger.debug("Waiting %.1fs for rate limit usage to recover before requesting %s", delay, endpoint)
+        await asyncio.sleep(delay)
+
+
+async def aclose_http_client() -> None:
+    """Close the running loop's Graph API client; called when the MCP server shuts down"""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
 # Log key environment and configuration at startup
 logger.info("Core API module initialized")
 logger.info(f"Graph API Version: {META_GRAPH_API_VERSION}")
 logger.info(f"META_APP_ID env var present: {'Yes' if os.environ.get('META_APP_ID') else 'No'}")
 
+def _response_cache_key(endpoint: str, access_token: str, params: Dict[str, Any]) -> tuple:
+    """
+    Build the response cache key for a GET request.
+    
+    The token and params are folded into a fixed-size digest so cache entries
+    never hold raw access tokens; the endpoint stays readable for invalidation.
+    """
+    canonical = "\n".join([access_token, *(f"{k}={v}" for k, v in sorted(params.items()))])
+    return (endpoint, hashlib.blake2b(canonical.encode(), digest_size=16).digest())
+
+
+def invalidate_response_cache(endpoint_prefix: Optional[str] = None) -> None:
+    """
+    Drop cached GET responses.
+    
+    Args:
+        endpoint_prefix: Only drop endpoints starting with this prefix; drops everything when omitted
+    """
+    if endpoint_prefix is None:
+        _response_cache.clear()
+    else:
+        _response_cache.discard_where(lambda key: key[0].startswith(endpoint_prefix))
+
+
 class GraphAPIError(Exception):
     """Exception raised for errors from the Graph API."""
     def __init__(self, error_data: Dict[str, Any]):
@@ -27,11 +275,11 @@ class GraphAPIError(Exception):
         super().__init__(self.message)
         
         # Log error details
-        logger.error(f"Graph API Error: {self.message}")
-        logger.debug(f"Error details: {error_data}")
+        logger.error("Graph API Error: %s", self.message)
+        logger.debug("Error details: %s", error_data)
         
         # Check if this is an auth error
-        if "code" in error_data and error_data["code"] in [190, 102, 4]:
+        if "code" in error_data and error_data["code"] in _TOKEN_ERROR_CODES:
             # Common auth error codes
             logger.warning(f"Auth error detected (code: {error_data['code']}). Invalidating token.")
             auth_manager.invalidate_token()
@@ -41,7 +289,9 @@ async def make_api_request(
     endpoint: str,
     access_token: str,
     params: Optional[Dict[str, Any]] = None,
-    method: str = "GET"
+    method: str = "GET",
+    files: Optional[Dict[str, Any]] = None,
+    bypass_cache: bool = False
 ) -> Dict[str, Any]:
     """
     Make a request to the Meta Graph API.
@@ -51,6 +301,8 @@ async def make_api_request(
         access_token: Meta API access token
         params: Additional query parameters
         method: HTTP method (GET, POST, DELETE)
+        files: Files to send as a multipart upload (POST only), in httpx format
+        bypass_cache: Skip the short-lived GET response cache and always hit the API
     
     Returns:
         API response as a dictionary
@@ -66,54 +318,94 @@ async def make_api_request(
             }
         }
         
-    url = f"{META_GRAPH_API_BASE}/{endpoint}"
+    request_params = params or {}
     
-    headers = {
-        "User-Agent": USER_AGENT,
-    }
+    cache_key = None
+    if method == "GET":
+        cache_key = _response_cache_key(endpoint, access_token, request_params)
+        if not bypass_cache:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                logger.debug("API Request: %s %s (cached)", method, endpoint)
+                return json_loads(cached)
+            
+            # Join an identical request that is already in flight instead of repeating it
+            flight_key = (asyncio.get_running_loop(), cache_key)
+            pending = _inflight_requests.get(flight_key)
+            if pending is not None:
+                logger.debug("API Request: %s %s (joined in-flight request)", method, endpoint)
+                result = await asyncio.shield(pending)
+                if result is not None:
+                    return copy.deepcopy(result)
+            else:
+                future = _inflight_requests[flight_key] = asyncio.get_running_loop().create_future()
+                try:
+                    result = await make_api_request(endpoint, access_token, params, method, files, bypass_cache=True)
+                    # Waiters copy from a snapshot, since the caller may mutate result
+                    # before they resume
+                    future.set_result(copy.deepcopy(result))
+                    return result
+                finally:
+                    # If this request was cancelled, waiters fall back to their own request
+                    if not future.done():
+                        future.set_result(None)
+                    _inflight_requests.pop(flight_key, None)
     
-    request_params = params or {}
-    request_params["access_token"] = access_token
+    # Send the token as a bearer header so it stays out of URLs, logs and the caller's params
+    auth_headers = {"Authorization": f"Bearer {access_token}"}
     
-    # Logging the request (masking token for security)
-    masked_params = {k: "***TOKEN***" if k == "access_token" else v for k, v in request_params.items()}
-    logger.debug(f"API Request: {method} {url}")
-    logger.debug(f"Request params: {masked_params}")
+    logger.debug("API Request: %s %s params=%s", method, endpoint, request_params)
     
     # Check for app_id in params
     app_id = auth_manager.app_id
-    logger.debug(f"Current app_id from auth_manager: {app_id}")
+    logger.debug("Current app_id from auth_manager: %s", app_id)
+    
+    await _wait_for_usage_headroom(endpoint)
     
-    async with httpx.AsyncClient() as client:
+    limiter = _request_limiter()
+    async with _graph_client() as client, limiter.slot():
+        started = time.perf_counter()
         try:
             if method == "GET":
-                response = await client.get(url, params=request_params, headers=headers, timeout=30.0)
+                response = await client.get(endpoint, params=request_params, headers=auth_headers)
             elif method == "POST":
-                # For Meta API, POST requests need data, not JSON
-                if 'targeting' in request_params and isinstance(request_params['targeting'], dict):
-                    # Convert targeting dict to string for the API
-                    request_params['targeting'] = json.dumps(request_params['targeting'])
-                
-                # Convert lists and dicts to JSON strings    
-                for key, value in request_params.items():
-                    if isinstance(value, (list, dict)):
-                        request_params[key] = json.dumps(value)
+                # For Meta API, POST requests need form data, with lists and dicts
+                # (e.g. targeting) sent as JSON strings. Build a new dict so the
+                # caller's params are left untouched.
+                request_params = {
+                    key: json_dumps(value) if isinstance(value, (list, dict)) else value
+                    for key, value in request_params.items()
+                }
                 
-                logger.debug(f"POST params (prepared): {masked_params}")
-                response = await client.post(url, data=request_params, headers=headers, timeout=30.0)
+                logger.debug("POST params (prepared): %s", request_params)
+                response = await client.post(endpoint, data=request_params, files=files, headers=auth_headers)
             elif method == "DELETE":
-                response = await client.delete(url, params=request_params, headers=headers, timeout=30.0)
+                response = await client.delete(endpoint, params=request_params, headers=auth_headers)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
+            _record_usage(endpoint, response.headers)
+            latency = time.perf_counter() - started
+            if response.is_success:
+                limiter.record(latency)
             response.raise_for_status()
-            logger.debug(f"API Response status: {response.status_code}")
+            logger.debug("API Response status: %s (content-encoding: %s)", response.status_code, response.headers.get("content-encoding"))
+            
+            # Writes can change any listing that includes the object, so drop all cached reads.
+            # Batches POST to the root endpoint even when read-only, so make_batch_api_request
+            # decides for those from their sub-requests.
+            if method != "GET" and endpoint:
+                invalidate_response_cache()
             
             # Ensure the response is JSON and return it as a dictionary
             try:
-                return response.json()
-            except json.JSONDecodeError:
-                # If not JSON, return text content in a structured format
+                # Decode straight from the body bytes with orjson rather than httpx's stdlib json
+                result = json_loads(response.content)
+                if cache_key is not None:
+                    _response_cache.set(cache_key, response.content)
+                return result
+            except ValueError:
+                # Not JSON (orjson raises a ValueError subclass), so return text content in a structured format
                 return {
                     "text_response": response.text,
                     "status_code": response.status_code
@@ -122,11 +414,15 @@ async def make_api_request(
         except httpx.HTTPStatusError as e:
             error_info = {}
             try:
-                error_info = e.response.json()
-            except:
+                error_info = json_loads(e.response.content)
+            except ValueError:
                 error_info = {"status_code": e.response.status_code, "text": e.response.text}
             
-            logger.error(f"HTTP Error: {e.response.status_code} - {error_info}")
+            logger.error("HTTP Error: %s - %s", e.response.status_code, error_info)
+            
+            # Meta throttles with HTTP 400 and a rate limit code rather than 429
+            rate_limited = _is_rate_limited(e.response.status_code, error_info)
+            limiter.record(latency, error=rate_limited or e.response.status_code >= 500)
             
             # Check for authentication errors
             if e.response.status_code == 401 or e.response.status_code == 403:
@@ -135,12 +431,12 @@ async def make_api_request(
             elif "error" in error_info:
                 error_obj = error_info.get("error", {})
                 # Check for specific FB API errors related to auth
-                if isinstance(error_obj, dict) and error_obj.get("code") in [190, 102, 4, 200, 10]:
-                    logger.warning(f"Detected Facebook API auth error: {error_obj.get('code')}")
+                if isinstance(error_obj, dict) and error_obj.get("code") in _AUTH_ERROR_CODES:
+                    logger.warning("Detected Facebook API auth error: %s", error_obj.get("code"))
                     # Log more details about app ID related errors
-                    if error_obj.get("code") == 200 and "Provide valid app ID" in error_obj.get("message", ""):
+                    if _is_app_id_config_error(error_obj):
                         logger.error("Meta API authentication configuration issue")
-                        logger.error(f"Current app_id: {app_id}")
+                        logger.error("Current app_id: %s", app_id)
                         # Provide a clearer error message without the confusing "Provide valid app ID" message
                         return {
                             "error": {
@@ -151,47 +447,247 @@ async def make_api_request(
                         }
                     auth_manager.invalidate_token()
             
-            # Include full details for technical users
-            full_response = {
-                "headers": dict(e.response.headers),
-                "status_code": e.response.status_code,
-                "url": str(e.response.url),
-                "reason": getattr(e.response, "reason_phrase", "Unknown reason"),
-                "request_method": e.request.method,
-                "request_url": str(e.request.url)
+            # Return a properly structured error object
+            error = {
+                "message": f"HTTP Error: {e.response.status_code}",
+                "details": error_info,
+                "status_code": e.response.status_code
             }
+            if rate_limited:
+                error["retry_after"] = _retry_after_seconds(e.response.headers)
             
-            # Return a properly structured error object
-            return {
-                "error": {
-                    "message": f"HTTP Error: {e.response.status_code}",
-                    "details": error_info,
-                    "full_response": full_response
+            # Include full details for technical users when asked to
+            if _INCLUDE_DEBUG_ON_ERROR:
+                error["full_response"] = {
+                    "headers": dict(e.response.headers),
+                    "status_code": e.response.status_code,
+                    "url": str(e.response.url),
+                    "reason": getattr(e.response, "reason_phrase", "Unknown reason"),
+                    "request_method": e.request.method,
+                    "request_url": str(e.request.url)
                 }
-            }
+            return {"error": error}
         
         except Exception as e:
-            logger.error(f"Request Error: {str(e)}")
+            # Timeouts and dropped connections are a sign Meta is struggling too
+            if isinstance(e, httpx.TransportError):
+                limiter.record(time.perf_counter() - started, error=True)
+                logger.warning("Network error on %s %s: %r", method, endpoint, e)
+                return {"error": {"message": str(e) or type(e).__name__, "network_error": True}}
+            logger.exception("Request Error: %s", e)
             return {"error": {"message": str(e)}}
 
 
+def _is_app_id_config_error(err: Dict[str, Any]) -> bool:
+    """Check whether a Graph API error object is Meta's misconfigured app ID error"""
+    return err.get("code") == 200 and _APP_ID_ERROR_MARK in (err.get("message") or "")
+
+
+def _is_rate_limited(status_code: int, error_info: Any) -> bool:
+    """Check whether an HTTP error status and body signal throttling"""
+    if status_code == 429:
+        return True
+    error_obj = error_info.get("error") if isinstance(error_info, dict) else None
+    return isinstance(error_obj, dict) and error_obj.get("code") in RATE_LIMIT_ERROR_CODES
+
+
+def _retry_after_seconds(headers: httpx.Headers) -> float:
+    """
+    Work out how long Meta asks us to wait from a throttled response's headers.
+    
+    Args:
+        headers: Response headers
+    
+    Returns:
+        Seconds to wait, or 0 when no hint is provided
+    """
+    # Retry-After gives the wait directly, in seconds
+    wait_seconds = 0
+    try:
+        wait_seconds = max(0, float(headers.get("retry-after") or 0))
+    except ValueError:
+        pass
+    
+    # X-Business-Use-Case-Usage reports minutes until access is regained per business
+    usage_header = headers.get("x-business-use-case-usage")
+    if usage_header:
+        try:
+            for usages in json_loads(usage_header).values():
+                for usage in usages:
+                    minutes = usage.get("estimated_time_to_regain_access") or 0
+                    wait_seconds = max(wait_seconds, minutes * 60)
+        except (ValueError, AttributeError, TypeError):
+            pass
+    return wait_seconds
+
+
+def _rate_limit_wait_hint(response: Dict[str, Any]) -> Optional[float]:
+    """
+    Check whether an API response is a rate-limit error.
+    
+    Args:
+        response: Dictionary returned by make_api_request
+    
+    Returns:
+        None if the response is not rate limited, otherwise the number of
+        seconds Meta asks us to wait (0 when no hint is provided)
+    """
+    # Batch requests return a list of sub-responses on success
+    error = response.get("error") if isinstance(response, dict) else None
+    if not isinstance(error, dict) or "retry_after" not in error:
+        return None
+    return error["retry_after"]
+
+
+def _is_transient_error(response: Dict[str, Any]) -> bool:
+    """Check whether an API response is a server or network error worth retrying"""
+    error = response.get("error") if isinstance(response, dict) else None
+    if not isinstance(error, dict):
+        return False
+    return error.get("network_error", False) or error.get("status_code") in TRANSIENT_STATUS_CODES
+
+
+async def make_api_request_with_backoff(
+    endpoint: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    method: str = "GET",
+    files: Optional[Dict[str, Any]] = None,
+    max_attempts: int = 5,
+    bypass_cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Make a Graph API request, retrying with exponential backoff when rate limited
+    or, for GET and DELETE requests, when Meta returns a transient 5xx error or
+    the connection fails.
+    
+    Args:
+        endpoint: API endpoint path (without base URL)
+        access_token: Meta API access token
+        params: Additional query parameters
+        method: HTTP method (GET, POST, DELETE)
+        files: Files to send as a multipart upload (POST only); uploads are not retried
+        max_attempts: Maximum number of attempts before returning the last error
+        bypass_cache: Skip the short-lived GET response cache and always hit the API
+    
+    Returns:
+        API response as a dictionary
+    """
+    for attempt in range(max_attempts):
+        response = await make_api_request(endpoint, access_token, params, method, files, bypass_cache)
+        
+        wait_hint = _rate_limit_wait_hint(response)
+        if wait_hint is None and method != "POST" and _is_transient_error(response):
+            wait_hint = 0
+        if wait_hint is None or files or attempt == max_attempts - 1:
+            return response
+        
+        # Give up early if Meta says access won't come back within our backoff window
+        if wait_hint > MAX_BACKOFF_SECONDS:
+            logger.warning("Rate limited on %s; access regained in %ss, not retrying", endpoint, wait_hint)
+            return response
+        
+        delay = max(wait_hint, min(2 ** attempt + random.random(), MAX_BACKOFF_SECONDS))
+        logger.warning("Request to %s failed with a retryable error; retrying in %.1fs (attempt %d/%d)", endpoint, delay, attempt + 1, max_attempts)
+        await asyncio.sleep(delay)
+    
+    return response
+
+
+def _parse_batch_response(item: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn one /batch sub-response into the dictionary make_api_request would return"""
+    if item is None:
+        # Meta returns null for sub-requests it didn't get to before timing out
+        return {"error": {"message": "Batch request did not complete"}}
+    
+    try:
+        body = json_loads(item.get("body") or "{}")
+    except ValueError:
+        body = {"text_response": item.get("body")}
+    
+    status_code = item.get("code")
+    if status_code != 200:
+        return {
+            "error": {
+                "message": f"HTTP Error: {status_code}",
+                "details": body,
+                "status_code": status_code
+            }
+        }
+    return body
+
+
+async def make_batch_api_request(access_token: str, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Send many Graph API requests through the /batch endpoint.
+    
+    Args:
+        access_token: Meta API access token
+        requests: Sub-requests, e.g. {"method": "GET", "relative_url": "123?fields=name"}
+    
+    Returns:
+        One response dictionary per sub-request, in the same order, shaped like
+        the results of make_api_request
+    """
+    async def send_chunk(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        data = await make_api_request_with_backoff(
+            "", access_token, {"batch": chunk, "include_headers": "false"}, method="POST"
+        )
+        if not isinstance(data, list):
+            # The batch itself failed (e.g. an invalid token), so every sub-request did
+            error = data.get("error") if isinstance(data, dict) else None
+            return [{"error": error or {"message": "Unexpected batch response"}} for _ in chunk]
+        return [_parse_batch_response(item) for item in data]
+    
+    # Meta accepts at most 50 sub-requests per batch; chunks run concurrently
+    chunks = await asyncio.gather(*(
+        send_chunk(requests[i:i + MAX_BATCH_REQUESTS]) for i in range(0, len(requests), MAX_BATCH_REQUESTS)
+    ))
+    
+    # Only batches that write can leave cached reads stale
+    if any(request.get("method", "GET").upper() != "GET" for request in requests):
+        invalidate_response_cache()
+    return [response for chunk in chunks for response in chunk]
+
+
+@functools.lru_cache(maxsize=8)
+def _auth_required_response(app_id: str, auth_url: str, pipeboard_enabled: bool) -> str:
+    """
+    Build the serialized "Authentication Required" tool response.
+    
+    Cached because a misconfigured server returns it on every tool call; the
+    arguments cover everything that varies, so a changed app ID or redirect
+    port simply produces a new entry.
+    """
+    return json_dumps({
+        "error": {
+            "message": "Authentication Required",
+            "details": {
+                "description": "You need to authenticate with the Meta API before using this tool",
+                "action_required": "Please authenticate first",
+                "auth_url": auth_url,
+                "configuration_status": {
+                    "app_id_configured": bool(app_id) and app_id != "YOUR_META_APP_ID",
+                    "pipeboard_enabled": pipeboard_enabled,
+                },
+                "troubleshooting": "Check logs for TOKEN VALIDATION FAILED messages",
+                "markdown_link": f"[Click here to authenticate with Meta Ads API]({auth_url})"
+            }
+        }
+    })
+
+
 # Generic wrapper for all Meta API tools
 def meta_api_tool(func):
     """Decorator for Meta API tools that handles authentication and error handling."""
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            # Log function call
-            logger.debug(f"Function call: {func.__name__}")
-            logger.debug(f"Args: {args}")
-            # Log kwargs without sensitive info
-            safe_kwargs = {k: ('***TOKEN***' if k == 'access_token' else v) for k, v in kwargs.items()}
-            logger.debug(f"Kwargs: {safe_kwargs}")
-            
-            # Log app ID information
-            app_id = auth_manager.app_id
-            logger.debug(f"Current app_id: {app_id}")
-            logger.debug(f"META_APP_ID env var: {os.environ.get('META_APP_ID')}")
+            # Log function call, without sensitive info
+            if logger.isEnabledFor(logging.DEBUG):
+                safe_kwargs = {k: ('***TOKEN***' if k == 'access_token' else v) for k, v in kwargs.items()}
+                logger.debug("Function call: %s args=%s kwargs=%s", func.__name__, args, safe_kwargs)
+                logger.debug("Current app_id: %s, META_APP_ID env var: %s", auth_manager.app_id, os.environ.get('META_APP_ID'))
             
             # If access_token is not in kwargs or not kwargs['access_token'], try to get it from auth_manager
             if 'access_token' not in kwargs or not kwargs['access_token']:
@@ -203,16 +699,15 @@ def meta_api_tool(func):
                     else:
                         logger.warning("No access token available from auth_manager")
                         # Add more details about why token might be missing
-                        if (auth_manager.app_id == "YOUR_META_APP_ID" or not auth_manager.app_id) and not auth_manager.use_pipeboard:
+                        app_id = auth_manager.app_id
+                        if (app_id == "YOUR_META_APP_ID" or not app_id) and not auth_manager.use_pipeboard:
                             logger.error("TOKEN VALIDATION FAILED: No valid app_id configured")
                             logger.error("Please set META_APP_ID environment variable or configure in your code")
                         else:
                             logger.error("Check logs above for detailed token validation failures")
                 except Exception as e:
-                    logger.error(f"Error getting access token: {str(e)}")
-                    # Add stack trace for better debugging
-                    import traceback
-                    logger.error(f"Stack trace: {traceback.format_exc()}")
+                    # Include the stack trace for better debugging
+                    logger.exception("Error getting access token: %s", e)
             
             # Final validation - if we still don't have a valid token, return authentication required
             if 'access_token' not in kwargs or not kwargs['access_token']:
@@ -221,68 +716,38 @@ def meta_api_tool(func):
                 # Add more specific troubleshooting information
                 auth_url = auth_manager.get_auth_url()
                 app_id = auth_manager.app_id
+                env_app_id = os.environ.get('META_APP_ID')
+                pipeboard_enabled = bool(os.environ.get('PIPEBOARD_API_TOKEN'))
                 
                 logger.error("TOKEN VALIDATION SUMMARY:")
-                logger.error(f"- Current app_id: '{app_id}'")
-                logger.error(f"- Environment META_APP_ID: '{os.environ.get('META_APP_ID', 'Not set')}'")
-                logger.error(f"- Pipeboard API token configured: {'Yes' if os.environ.get('PIPEBOARD_API_TOKEN') else 'No'}")
+                logger.error("- Current app_id: '%s'", app_id)
+                logger.error("- Environment META_APP_ID: '%s'", env_app_id or 'Not set')
+                logger.error("- Pipeboard API token configured: %s", 'Yes' if pipeboard_enabled else 'No')
                 
                 # Check for common configuration issues
                 if app_id == "YOUR_META_APP_ID" or not app_id:
                     logger.error("ISSUE DETECTED: No valid Meta App ID configured")
                     logger.error("ACTION REQUIRED: Set META_APP_ID environment variable with a valid App ID")
                 
-                return json.dumps({
-                    "error": {
-                        "message": "Authentication Required",
-                        "details": {
-                            "description": "You need to authenticate with the Meta API before using this tool",
-                            "action_required": "Please authenticate first",
-                            "auth_url": auth_url,
-                            "configuration_status": {
-                                "app_id_configured": bool(app_id) and app_id != "YOUR_META_APP_ID",
-                                "pipeboard_enabled": bool(os.environ.get('PIPEBOARD_API_TOKEN')),
-                            },
-                            "troubleshooting": "Check logs for TOKEN VALIDATION FAILED messages",
-                            "markdown_link": f"[Click here to authenticate with Meta Ads API]({auth_url})"
-                        }
-                    }
-                }, indent=2)
+                return _auth_required_response(app_id, auth_url, pipeboard_enabled)
                 
             # Call the original function
             result = await func(*args, **kwargs)
             
-            # If the result is a string (JSON), try to parse it to check for errors
+            # Tools serialize their own output with json_dumps, so trust it
+            # instead of parsing it again just to look for an error key
             if isinstance(result, str):
-                try:
-                    result_dict = json.loads(result)
-                    if "error" in result_dict:
-                        logger.error(f"Error in API response: {result_dict['error']}")
-                        # If this is an app ID error, log more details
-                        if isinstance(result_dict.get("details", {}).get("error", {}), dict):
-                            error_obj = result_dict["details"]["error"]
-                            if error_obj.get("code") == 200 and "Provide valid app ID" in error_obj.get("message", ""):
-                                logger.error("Meta API authentication configuration issue")
-                                logger.error(f"Current app_id: {app_id}")
-                                # Replace the confusing error with a more user-friendly one
-                                return json.dumps({
-                                    "error": {
-                                        "message": "Meta API Configuration Issue",
-                                        "details": {
-                                            "description": "Your Meta API app is not properly configured",
-                                            "action_required": "Check your META_APP_ID environment variable",
-                                            "current_app_id": app_id,
-                                            "original_error": error_obj.get("message")
-                                        }
-                                    }
-                                }, indent=2)
-                except Exception:
-                    # Not JSON or other parsing error, wrap it in a dictionary
-                    return json.dumps({"data": result}, indent=2)
+                if result.lstrip().startswith(("{", "[")):
+                    return result
+                # Plain text isn't JSON, so wrap it
+                return json_dumps({"data": result})
             
-            # If result is already a dictionary, ensure it's properly serialized
+            # Dictionaries are serialized exactly once; make_api_request has
+            # already rewritten app ID configuration errors
             if isinstance(result, dict):
-                return json.dumps(result, indent=2)
+                if "error" in result:
+                    logger.error("Error in API response: %s", result["error"])
+                return json_dumps(result)
             
             return result
         except Exception as e:
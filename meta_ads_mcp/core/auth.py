@@ -2,13 +2,12 @@
 
 from typing import Any, Dict, Optional
 import time
-import platform
 import pathlib
 import os
 import webbrowser
 import asyncio
-import json
-from .utils import logger
+from urllib.parse import urlencode
+from .utils import logger, json_dumps, json_loads, get_config_dir
 import requests
 
 # Import from the new callback server module
@@ -16,6 +15,7 @@ from .callback_server import (
     start_callback_server,
     shutdown_callback_server,
     token_container,
+    token_received,
     callback_server_port
 )
 
@@ -26,6 +26,8 @@ from .pipeboard_auth import pipeboard_auth_manager
 AUTH_SCOPE = "ads_management,ads_read,business_management,public_profile"
 AUTH_REDIRECT_URI = "http://localhost:8888/callback"
 AUTH_RESPONSE_TYPE = "token"
+# Treat tokens as expired slightly early so a request never starts with a token about to lapse
+TOKEN_EXPIRY_SKEW_SECONDS = 60
 
 # Log important configuration information
 logger.info("Authentication module initialized")
@@ -59,7 +61,7 @@ class MetaConfig:
         """Get the current Meta App ID"""
         # Check if we have one set
         if hasattr(self, 'app_id') and self.app_id:
-            logger.debug(f"Using app_id from instance: {self.app_id}")
+            logger.debug("Using app_id from instance: %s", self.app_id)
             return self.app_id
         
         # If not, try environment variable
@@ -85,20 +87,25 @@ meta_config = MetaConfig()
 
 class TokenInfo:
     """Stores token information including expiration"""
+    # Checked on every API request via is_expired, so keep attribute access cheap
+    __slots__ = ("access_token", "expires_in", "user_id", "created_at", "_expires_at")
+    
     def __init__(self, access_token: str, expires_in: int = None, user_id: str = None):
         self.access_token = access_token
         self.expires_in = expires_in
         self.user_id = user_id
         self.created_at = int(time.time())
-        logger.debug(f"TokenInfo created. Expires in: {expires_in if expires_in else 'Not specified'}")
+        self._update_expiry()
+        logger.debug("TokenInfo created. Expires in: %s", expires_in if expires_in else 'Not specified')
+    
+    def _update_expiry(self) -> None:
+        """Precompute the time after which is_expired reports True"""
+        # If no expiration is set, assume it never expires
+        self._expires_at = self.created_at + self.expires_in - TOKEN_EXPIRY_SKEW_SECONDS if self.expires_in else None
     
     def is_expired(self) -> bool:
         """Check if the token is expired"""
-        if not self.expires_in:
-            return False  # If no expiration is set, assume it's not expired
-        
-        current_time = int(time.time())
-        return current_time > (self.created_at + self.expires_in)
+        return self._expires_at is not None and time.time() > self._expires_at
     
     def serialize(self) -> Dict[str, Any]:
         """Convert to a dictionary for storage"""
@@ -118,6 +125,7 @@ class TokenInfo:
             user_id=data.get("user_id")
         )
         token.created_at = data.get("created_at", int(time.time()))
+        token._update_expiry()
         return token
 
 
@@ -126,47 +134,65 @@ class AuthManager:
     def __init__(self, app_id: str, redirect_uri: str = AUTH_REDIRECT_URI):
         self.app_id = app_id
         self.redirect_uri = redirect_uri
-        self.token_info = None
+        # The cached token is read from disk on first access to token_info, not at import
+        self._token_info = None
+        self._token_loaded = False
+        # Resolved on first use by _get_token_cache_path
+        self._cache_path = None
+        # Last OAuth URL built, with the (app_id, redirect_uri) it was built for
+        self._auth_url = None
+        self._auth_url_key = None
+        # Serialized token last written to (or read from) the cache file
+        self._cached_payload = None
         # Check for Pipeboard token first
         self.use_pipeboard = bool(os.environ.get("PIPEBOARD_API_TOKEN", ""))
-        if not self.use_pipeboard:
-            self._load_cached_token()
+    
+    @property
+    def token_info(self) -> Optional[TokenInfo]:
+        """Current token, loaded from the cache file the first time it is needed"""
+        if not self._token_loaded:
+            self._token_loaded = True
+            if not self.use_pipeboard:
+                self._load_cached_token()
+        return self._token_info
+    
+    @token_info.setter
+    def token_info(self, value: Optional[TokenInfo]) -> None:
+        # An explicitly set token takes precedence over anything still on disk
+        self._token_loaded = True
+        self._token_info = value
     
     def _get_token_cache_path(self) -> pathlib.Path:
         """Get the platform-specific path for token cache file"""
-        if platform.system() == "Windows":
-            base_path = pathlib.Path(os.environ.get("APPDATA", ""))
-        elif platform.system() == "Darwin":  # macOS
-            base_path = pathlib.Path.home() / "Library" / "Application Support"
-        else:  # Assume Linux/Unix
-            base_path = pathlib.Path.home() / ".config"
-        
-        # Create directory if it doesn't exist
-        cache_dir = base_path / "meta-ads-mcp"
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        return cache_dir / "token_cache.json"
+        if self._cache_path is None:
+            # The directory is only created when a token is saved
+            self._cache_path = get_config_dir() / "token_cache.json"
+        return self._cache_path
     
     def _load_cached_token(self) -> bool:
         """Load token from cache if available"""
         cache_path = self._get_token_cache_path()
         
-        if not cache_path.exists():
+        try:
+            payload = cache_path.read_bytes()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.error(f"Error loading cached token: {e}")
             return False
         
         try:
-            with open(cache_path, "r") as f:
-                data = json.load(f)
-                self.token_info = TokenInfo.deserialize(data)
-                
-                # Check if token is expired
-                if self.token_info.is_expired():
-                    logger.info("Cached token is expired")
-                    self.token_info = None
-                    return False
-                
-                logger.info(f"Loaded cached token (expires in {(self.token_info.created_at + self.token_info.expires_in) - int(time.time())} seconds)")
-                return True
+            self.token_info = TokenInfo.deserialize(json_loads(payload))
+            self._cached_payload = payload.decode()
+            
+            # Check if token is expired
+            if self.token_info.is_expired():
+                logger.info("Cached token is expired")
+                self.token_info = None
+                return False
+            
+            logger.info(f"Loaded cached token (expires in {(self.token_info.created_at + self.token_info.expires_in) - int(time.time())} seconds)")
+            return True
         except Exception as e:
             logger.error(f"Error loading cached token: {e}")
             return False
@@ -176,24 +202,42 @@ class AuthManager:
         if not self.token_info:
             return
         
+        # Repeated saves of the same token (e.g. a re-delivered callback) skip the disk
+        payload = json_dumps(self.token_info.serialize())
+        if payload == self._cached_payload:
+            logger.debug("Token cache already up to date")
+            return
+        
         cache_path = self._get_token_cache_path()
         
         try:
-            with open(cache_path, "w") as f:
-                json.dump(self.token_info.serialize(), f)
+            # Create directory if it doesn't exist
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Write owner-readable only, via a temp file so a crash never leaves a truncated cache
+            tmp_path = cache_path.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload.encode())
+            os.replace(tmp_path, cache_path)
+            self._cached_payload = payload
             logger.info(f"Token cached at: {cache_path}")
         except Exception as e:
             logger.error(f"Error saving token to cache: {e}")
     
     def get_auth_url(self) -> str:
         """Generate the Facebook OAuth URL for desktop app flow"""
-        return (
-            f"https://www.facebook.com/v22.0/dialog/oauth?"
-            f"client_id={self.app_id}&"
-            f"redirect_uri={self.redirect_uri}&"
-            f"scope={AUTH_SCOPE}&"
-            f"response_type={AUTH_RESPONSE_TYPE}"
-        )
+        # app_id and redirect_uri are reassigned directly by callers, so key the cached URL on them
+        key = (self.app_id, self.redirect_uri)
+        if self._auth_url_key != key:
+            self._auth_url = "https://www.facebook.com/v22.0/dialog/oauth?" + urlencode({
+                "client_id": self.app_id,
+                "redirect_uri": self.redirect_uri,
+                "scope": AUTH_SCOPE,
+                "response_type": AUTH_RESPONSE_TYPE
+            })
+            self._auth_url_key = key
+        return self._auth_url
     
     def authenticate(self, force_refresh: bool = False) -> Optional[str]:
         """
@@ -265,11 +309,11 @@ class AuthManager:
             needs_authentication = True
             
             # Remove the cached token file
+            self._cached_payload = None
             try:
                 cache_path = self._get_token_cache_path()
-                if cache_path.exists():
-                    os.remove(cache_path)
-                    logger.info(f"Removed cached token file: {cache_path}")
+                cache_path.unlink(missing_ok=True)
+                logger.info(f"Removed cached token file: {cache_path}")
             except Exception as e:
                 logger.error(f"Error removing cached token file: {e}")
     
@@ -398,7 +442,27 @@ def exchange_token_for_long_lived(short_lived_token):
 
 
 async def get_current_access_token() -> Optional[str]:
-    """Get the current access token from auth manager"""
+    """
+    Get the current access token from auth manager
+    
+    Pipeboard lookups can refresh the token over the network, and the first
+    lookup reads the token cache from disk, so those run in a worker thread
+    instead of stalling the event loop. Otherwise the token is already in memory.
+    """
+    if os.environ.get("META_ACCESS_TOKEN") or (auth_manager._token_loaded and not auth_manager.use_pipeboard):
+        return get_current_access_token_sync()
+    return await asyncio.to_thread(get_current_access_token_sync)
+
+
+def get_current_access_token_sync() -> Optional[str]:
+    """
+    Get the current access token without going through a coroutine.
+    
+    This may block: the first call reads the token cache from disk, and with
+    Pipeboard the token can be refreshed over the network. Async code should
+    await get_current_access_token(), which only calls this inline when the
+    token is already in memory.
+    """
     # Check for environment variable first - this takes highest precedence
     env_token = os.environ.get("META_ACCESS_TOKEN")
     if env_token:
@@ -415,7 +479,7 @@ async def get_current_access_token() -> Optional[str]:
     # Log the function call and current app ID
     logger.debug("get_current_access_token() called")
     app_id = meta_config.get_app_id()
-    logger.debug(f"Current app_id: {app_id}")
+    logger.debug("Current app_id: %s", app_id)
     
     # Check if using Pipeboard authentication
     using_pipeboard = auth_manager.use_pipeboard
@@ -437,7 +501,7 @@ async def get_current_access_token() -> Optional[str]:
                 auth_manager.invalidate_token()
                 return None
                 
-            logger.debug(f"Access token found in auth_manager (starts with: {token[:10]}...)")
+            logger.debug("Access token found in auth_manager (starts with: %s...)", token[:10])
             return token
         else:
             logger.warning("No valid access token available in auth_manager")
@@ -463,9 +527,7 @@ async def get_current_access_token() -> Optional[str]:
             logger.error("To fix: Try re-authenticating or check if your token has been revoked")
             return None
     except Exception as e:
-        logger.error(f"Error getting access token: {str(e)}")
-        import traceback
-        logger.error(f"Token validation stacktrace: {traceback.format_exc()}")
+        logger.exception("Error getting access token: %s", e)
         return None
 
 
@@ -474,6 +536,7 @@ def login():
     Start the login flow to authenticate with Meta
     """
     print("Starting Meta Ads authentication flow...")
+    token_received.clear()
     
     try:
         # Start the callback server first
@@ -487,22 +550,19 @@ def login():
         # Wait for token to be received
         print("Waiting for authentication to complete...")
         max_wait = 300  # 5 minutes
-        wait_interval = 2  # 2 seconds
         
-        for _ in range(max_wait // wait_interval):
-            if token_container["token"]:
-                token = token_container["token"]
-                print("Authentication successful!")
-                # Verify token works by getting basic user info
-                try:
-                    from .api import make_api_request
-                    result = asyncio.run(make_api_request("me", token, {}))
-                    print(f"Authenticated as: {result.get('name', 'Unknown')} (ID: {result.get('id', 'Unknown')})")
-                    return
-                except Exception as e:
-                    print(f"Warning: Could not verify token: {e}")
-                    return
-            time.sleep(wait_interval)
+        # The callback server sets token_received as soon as the browser hands over the token
+        if token_container["token"] or token_received.wait(timeout=max_wait):
+            token = token_container["token"]
+            print("Authentication successful!")
+            # Verify token works by getting basic user info
+            try:
+                from .api import make_api_request
+                result = asyncio.run(make_api_request("me", token, {}))
+                print(f"Authenticated as: {result.get('name', 'Unknown')} (ID: {result.get('id', 'Unknown')})")
+            except Exception as e:
+                print(f"Warning: Could not verify token: {e}")
+            return
         
         print("Authentication timed out. Please try again.")
     except Exception as e:
@@ -1,12 +1,11 @@
 """Authentication-specific functionality for Meta Ads API."""
 
-import json
 import asyncio
 import os
 from .api import meta_api_tool
 from .auth import start_callback_server, shutdown_callback_server, auth_manager, get_current_access_token
 from .server import mcp_server
-from .utils import logger, META_APP_SECRET
+from .utils import logger, json_dumps, META_APP_SECRET
 from .pipeboard_auth import pipeboard_auth_manager
 
 
@@ -37,12 +36,12 @@ async def get_login_link(access_token: str = None) -> str:
         # If we already have a valid token and none was provided, just return success
         if cached_token and not access_token:
             logger.info("get_login_link called with existing valid Pipeboard token")
-            return json.dumps({
+            return json_dumps({
                 "message": "Already authenticated with Pipeboard",
                 "token_status": token_status,
                 "token_preview": cached_token[:10] + "..." if cached_token else None,
                 "authentication_method": "pipeboard"
-            }, indent=2)
+            })
         
         # Initiate the auth flow via Pipeboard
         try:
@@ -61,14 +60,14 @@ async def get_login_link(access_token: str = None) -> str:
                 "note": "After authenticating, the token will be automatically saved."
             }
             
-            return json.dumps(response, indent=2)
+            return json_dumps(response)
         except Exception as e:
             logger.error(f"Error initiating Pipeboard auth flow: {e}")
-            return json.dumps({
+            return json_dumps({
                 "error": f"Failed to initiate Pipeboard authentication: {str(e)}",
                 "message": "Please check your PIPEBOARD_API_TOKEN environment variable.",
                 "authentication_method": "pipeboard"
-            }, indent=2)
+            })
     else:
         # Original Meta authentication flow
         # Check if we have a cached token
@@ -78,19 +77,21 @@ async def get_login_link(access_token: str = None) -> str:
         # If we already have a valid token and none was provided, just return success
         if cached_token and not access_token:
             logger.info("get_login_link called with existing valid token")
-            return json.dumps({
+            return json_dumps({
                 "message": "Already authenticated",
                 "token_status": token_status,
                 "token_preview": cached_token[:10] + "...",
                 "created_at": auth_manager.token_info.created_at if hasattr(auth_manager, "token_info") else None,
                 "expires_in": auth_manager.token_info.expires_in if hasattr(auth_manager, "token_info") else None,
                 "authentication_method": "meta_oauth"
-            }, indent=2)
+            })
         
         # IMPORTANT: Start the callback server first by calling our helper function
-        # This ensures the server is ready before we provide the URL to the user
+        # This ensures the server is ready before we provide the URL to the user:
+        # it returns once the socket is bound and listening, so no extra wait is
+        # needed. Binding blocks, so it runs off the event loop.
         logger.info("Starting callback server for authentication")
-        port = start_callback_server()
+        port = await asyncio.to_thread(start_callback_server)
         logger.info(f"Callback server started on port {port}")
         
         # Generate direct login URL
@@ -120,7 +121,4 @@ async def get_login_link(access_token: str = None) -> str:
             "note": "After authenticating, the token will be automatically saved."
         }
         
-        # Wait a moment to ensure the server is fully started
-        await asyncio.sleep(1)
-        
-        return json.dumps(response, indent=2) 
\ No newline at end of file
+        return json_dumps(response) 
\ No newline at end of file
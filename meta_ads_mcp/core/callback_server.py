@@ -1,20 +1,24 @@
 """Callback server for Meta Ads API authentication and confirmations."""
 
 import threading
-import socket
+import time
 import asyncio
+import html
 import json
 import logging
 import webbrowser
 import os
+import string
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs, quote
+from urllib.parse import urlparse, parse_qs, quote, unquote, unquote_plus
 from typing import Dict, Any, Optional
 
 from .utils import logger
 
 # Global token container for communication between threads
 token_container = {"token": None, "expires_in": None, "user_id": None}
+# Set once a token has been stored in token_container
+token_received = threading.Event()
 
 # Global container for update confirmations
 update_confirmation = {"approved": False}
@@ -26,9 +30,497 @@ callback_server_running = False
 callback_server_port = None
 callback_server_instance = None
 server_shutdown_timer = None
+# Monotonic time of the last start_callback_server call, used for the idle shutdown
+callback_server_last_activity = 0.0
 
 # Timeout in seconds before shutting down the callback server
 CALLBACK_SERVER_TIMEOUT = 180  # 3 minutes timeout
+# First port tried for the callback server (matches the default OAuth redirect URI)
+# and how many consecutive ports to try before falling back to an OS-assigned one
+CALLBACK_SERVER_PORT = 8888
+CALLBACK_SERVER_PORT_ATTEMPTS = 10
+
+# Long-lived event loop that runs the handlers' Graph API calls, started on first use
+_handler_loop: Optional[asyncio.AbstractEventLoop] = None
+_handler_loop_lock = threading.Lock()
+
+
+# Static page served on /callback; it forwards the token from the URL fragment to /token
+_CALLBACK_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Authentication Successful</title>
+    <style>
+        body { 
+            font-family: Arial, sans-serif; 
+            line-height: 1.6;
+            color: #333;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .success { 
+            color: #4CAF50;
+            font-size: 24px;
+            margin-bottom: 20px;
+        }
+        .info {
+            background-color: #f5f5f5;
+            padding: 15px;
+            border-radius: 4px;
+            margin-bottom: 20px;
+        }
+        .button {
+            background-color: #4CAF50;
+            color: white;
+            padding: 10px 15px;
+            border: none;
+            border-radius: 4px;
+            cursor: pointer;
+        }
+    </style>
+</head>
+<body>
+    <div class="success">Authentication Successful!</div>
+    <div class="info">
+        <p>Your Meta Ads API token has been received.</p>
+        <p>You can now close this window and return to the application.</p>
+    </div>
+    <button class="button" onclick="window.close()">Close Window</button>
+
+    <script>
+    // Function to parse URL parameters including fragments
+    function parseURL(url) {
+        var params = {};
+        var parser = document.createElement('a');
+        parser.href = url;
+
+        // Parse fragment parameters
+        var fragment = parser.hash.substring(1);
+        var fragmentParams = fragment.split('&');
+
+        for (var i = 0; i < fragmentParams.length; i++) {
+            var pair = fragmentParams[i].split('=');
+            params[pair[0]] = decodeURIComponent(pair[1]);
+        }
+
+        return params;
+    }
+
+    // Parse the URL to get the access token
+    var params = parseURL(window.location.href);
+    var token = params['access_token'];
+    var expires_in = params['expires_in'];
+
+    // Send the token to the server
+    if (token) {
+        // Create XMLHttpRequest object
+        var xhr = new XMLHttpRequest();
+
+        // Configure it to make a GET request to the /token endpoint
+        xhr.open('GET', '/token?token=' + encodeURIComponent(token) + 
+                      '&expires_in=' + encodeURIComponent(expires_in), true);
+
+        // Set up a handler for when the request is complete
+        xhr.onload = function() {
+            if (xhr.status === 200) {
+                console.log('Token successfully sent to server');
+            } else {
+                console.error('Failed to send token to server');
+            }
+        };
+
+        // Send the request
+        xhr.send();
+    } else {
+        console.error('No token found in URL');
+        document.body.innerHTML += '<div style="color: red; margin-top: 20px;">Error: No authentication token found. Please try again.</div>';
+    }
+    </script>
+</body>
+</html>
+""".encode()
+# Plain-text body acknowledging a token
+_TOKEN_RECEIVED = b"Token received"
+
+# Pages for confirming and verifying ad/ad set updates. They are parsed once at
+# import and filled with string.Template.substitute per request; literal "$" in
+# the page JavaScript is written as "$$".
+_CONFIRM_UPDATE_TEMPLATE = string.Template("""
+<html>
+<head>
+    <title>Confirm $object_type Update</title>
+    <meta charset="utf-8">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 20px; max-width: 1000px; margin: 0 auto; }
+        .warning { color: #d73a49; margin: 20px 0; padding: 15px; border-left: 4px solid #d73a49; background-color: #fff8f8; }
+        .changes { background: #f6f8fa; padding: 15px; border-radius: 6px; }
+        .buttons { margin-top: 20px; }
+        button { padding: 10px 20px; margin-right: 10px; border-radius: 6px; cursor: pointer; }
+        .approve { background: #2ea44f; color: white; border: none; }
+        .cancel { background: #d73a49; color: white; border: none; }
+        .diff-table { width: 100%; border-collapse: collapse; margin: 15px 0; }
+        .diff-table td { padding: 8px; border: 1px solid #ddd; }
+        .diff-table .header { background: #f1f8ff; font-weight: bold; }
+        .status { padding: 15px; margin-top: 20px; border-radius: 6px; display: none; }
+        .success { background-color: #e6ffed; border: 1px solid #2ea44f; color: #22863a; }
+        .error { background-color: #ffeef0; border: 1px solid #d73a49; color: #d73a49; }
+        pre { white-space: pre-wrap; word-break: break-all; }
+    </style>
+</head>
+<body>
+    <h1>Confirm $object_type Update</h1>
+    <p>You are about to update $object_type: <strong>$object_id</strong></p>
+    
+    <div class="warning">
+        <p><strong>Warning:</strong> This action will directly update your $object_type_lower in Meta Ads. Please review the changes carefully before approving.</p>
+    </div>
+    
+    <div class="changes">
+        <h3>Changes to apply:</h3>
+        <table class="diff-table">
+            <tr class="header">
+                <td>Field</td>
+                <td>New Value</td>
+                <td>Description</td>
+            </tr>
+            $rows
+        </table>
+    </div>
+    
+    <div class="buttons">
+        <button class="approve" onclick="approveChanges()">Approve Changes</button>
+        <button class="cancel" onclick="cancelChanges()">Cancel</button>
+    </div>
+    
+    <div id="status" class="status"></div>
+
+    <script>
+        // Get the approve button
+        const approveBtn = document.querySelector('.approve');
+        const cancelBtn = document.querySelector('.cancel');
+        const statusDiv = document.querySelector('.status');
+        
+        let debugMode = false;
+        // Function to log debug messages
+        function debugLog(...args) {
+            if (debugMode) {
+                console.log(...args);
+            }
+        }
+        
+        // Add event listeners to buttons
+        approveBtn.addEventListener('click', approveChanges);
+        cancelBtn.addEventListener('click', cancelChanges);
+        
+        function showStatus(message, isError = false) {
+            statusDiv.textContent = message;
+            statusDiv.style.display = 'block';
+            statusDiv.className = 'status ' + (isError ? 'error' : 'success');
+        }
+        
+        function approveChanges() {
+            // Disable buttons to prevent double-submission
+            const buttons = [approveBtn, cancelBtn];
+            buttons.forEach(button => button.disabled = true);
+            
+            showStatus('Approving changes...');
+            
+            // Determine which object type we're updating
+            const isAd = Boolean($ad_id_js); 
+            const objectType = isAd ? 'ad' : 'adset';
+            const objectId = $object_id_js;
+            
+            // Create parameters
+            const params = new URLSearchParams({
+                action: 'approve',
+                token: $token_js,
+                changes: $changes_js
+            });
+            
+            // Add the appropriate ID parameter based on object type
+            if (isAd) {
+                params.append('ad_id', objectId);
+            } else {
+                params.append('adset_id', objectId);
+            }
+            
+            debugLog("Sending update request with params", {
+                objectType,
+                objectId,
+                changes: JSON.parse($changes_js)
+            });
+            
+            fetch('/update-confirm?' + params)
+            .then(response => response.json())
+            .then(data => {
+                debugLog("Update response data", data);
+                buttons.forEach(button => button.disabled = false);
+                
+                // Handle result
+                if (data.status === 'error') {
+                    let errorMessage = data.error || 'Unknown error';
+                    const originalErrorDetails = data.api_error || {};
+                    
+                    showStatus('Error: ' + errorMessage, true);
+                    
+                    // Create a detailed error object for the verification page
+                    const fullErrorData = {
+                        message: errorMessage,
+                        details: data.errorDetails || [],
+                        apiError: originalErrorDetails || data.apiError || {},
+                        fullResponse: data.fullResponse || {}
+                    };
+                    
+                    debugLog("Redirecting with error message", errorMessage);
+                    debugLog("Full error data", fullErrorData);
+                    
+                    // Encode the stringified error object
+                    const encodedErrorData = encodeURIComponent(JSON.stringify(fullErrorData));
+                    
+                    // Redirect to verification page with detailed error information
+                    const errorParams = new URLSearchParams({
+                        token: $token_js,
+                        error: errorMessage,
+                        errorData: encodedErrorData
+                    });
+                    
+                    // Add the appropriate ID parameter based on object type
+                    if (isAd) {
+                        errorParams.append('ad_id', objectId);
+                    } else {
+                        errorParams.append('adset_id', objectId);
+                    }
+                    
+                    window.location.href = '/verify-update?' + errorParams;
+                } else {
+                    showStatus('Changes approved and will be applied shortly!');
+                    setTimeout(() => {
+                        const verifyParams = new URLSearchParams({
+                            token: $token_js
+                        });
+                        
+                        // Add the appropriate ID parameter based on object type
+                        if (isAd) {
+                            verifyParams.append('ad_id', objectId);
+                        } else {
+                            verifyParams.append('adset_id', objectId);
+                        }
+                        
+                        window.location.href = '/verify-update?' + verifyParams;
+                    }, 3000);
+                }
+            })
+            .catch(error => {
+                debugLog("Fetch error", error);
+                showStatus('Error applying changes: ' + error, true);
+                buttons.forEach(button => button.disabled = false);
+            });
+        }
+        
+        function cancelChanges() {
+            showStatus("Cancelling update...");
+            
+            // Determine which object type we're updating
+            const isAd = Boolean($ad_id_js); 
+            const objectId = $object_id_js;
+            
+            // Create parameters
+            const params = new URLSearchParams({
+                action: 'cancel'
+            });
+            
+            // Add the appropriate ID parameter based on object type
+            if (isAd) {
+                params.append('ad_id', objectId);
+            } else {
+                params.append('adset_id', objectId);
+            }
+            
+            fetch('/update-confirm?' + params)
+            .then(() => {
+                showStatus('Update cancelled.');
+                setTimeout(() => window.close(), 2000);
+            });
+        }
+    </script>
+</body>
+</html>
+""")
+
+_CHANGE_ROW_TEMPLATE = string.Template("""
+            <tr>
+                <td>$field</td>
+                <td><pre>$value</pre></td>
+                <td>$description</td>
+            </tr>""")
+
+_VERIFY_UPDATE_TEMPLATE = string.Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Verification - $object_type Update</title>
+    <meta charset="utf-8">
+    <style>
+        body { 
+            font-family: Arial, sans-serif; 
+            margin: 20px; 
+            max-width: 1000px; 
+            margin: 0 auto;
+            line-height: 1.6;
+        }
+        .header { 
+            margin-bottom: 20px; 
+            padding-bottom: 10px; 
+            border-bottom: 1px solid #ccc; 
+        }
+        .success { 
+            color: #2ea44f; 
+            background-color: #e6ffed; 
+            padding: 15px; 
+            border-radius: 6px; 
+            margin: 20px 0; 
+        }
+        .error { 
+            color: #d73a49; 
+            background-color: #ffeef0; 
+            padding: 15px; 
+            border-radius: 6px; 
+            margin: 20px 0; 
+        }
+        .details { 
+            background: #f6f8fa; 
+            padding: 15px; 
+            border-radius: 6px; 
+            margin: 20px 0; 
+        }
+        .btn {
+            display: inline-block;
+            padding: 10px 20px;
+            background-color: #0366d6;
+            color: white;
+            border-radius: 6px;
+            text-decoration: none;
+            margin-top: 20px;
+        }
+        pre {
+            white-space: pre-wrap;
+            word-break: break-word;
+            background: #f8f8f8;
+            padding: 10px;
+            border-radius: 4px;
+            overflow: auto;
+        }
+        #currentDetails {
+            display: none;
+            margin-top: 20px;
+        }
+        .toggle-btn {
+            background-color: #f1f8ff;
+            border: 1px solid #c8e1ff;
+            padding: 8px 16px;
+            border-radius: 4px;
+            cursor: pointer;
+            margin-top: 20px;
+            display: inline-block;
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>$object_type Update Verification</h1>
+        <p>Object ID: <strong>$object_id</strong></p>
+    </div>
+    $status
+<button class="toggle-btn" id="toggleDetails">Show Current Details</button>
+<div id="currentDetails">
+    <h3>Current $object_type Details:</h3>
+    <pre id="detailsJson">Loading...</pre>
+</div>
+
+<a href="#" class="btn" onclick="window.close()">Close Window</a>
+
+<script>
+    document.getElementById('toggleDetails').addEventListener('click', function() {
+        const detailsDiv = document.getElementById('currentDetails');
+        const toggleBtn = document.getElementById('toggleDetails');
+        
+        if (detailsDiv.style.display === 'block') {
+            detailsDiv.style.display = 'none';
+            toggleBtn.textContent = 'Show Current Details';
+        } else {
+            detailsDiv.style.display = 'block';
+            toggleBtn.textContent = 'Hide Current Details';
+            
+            // Fetch current details if not already loaded
+            if (document.getElementById('detailsJson').textContent === 'Loading...') {
+                fetchCurrentDetails();
+            }
+        }
+    });
+    
+    function fetchCurrentDetails() {
+        const objectId = $object_id_js;
+        const objectType = $object_type_js;
+        const endpoint = objectType === 'ad' ? 
+            `/api/ad?ad_id=$${objectId}&token=$token_url` : 
+            `/api/adset?adset_id=$${objectId}&token=$token_url`;
+        
+        fetch(endpoint)
+            .then(response => response.json())
+            .then(data => {
+                document.getElementById('detailsJson').textContent = JSON.stringify(data, null, 2);
+            })
+            .catch(error => {
+                document.getElementById('detailsJson').textContent = `Error fetching details: $${error}`;
+            });
+    }
+</script>
+</body>
+</html>
+""")
+
+_UPDATE_FAILED_TEMPLATE = string.Template("""
+    <div class="error">
+        <h3>❌ Update Failed</h3>
+        <p><strong>Error:</strong> $error_message</p>
+        $error_details
+    </div>""")
+
+_ERROR_DETAILS_TEMPLATE = string.Template("""
+        <div class="details">
+            <h4>Error Details:</h4>
+            <pre>$details</pre>
+        </div>""")
+
+_UPDATE_SUCCEEDED_TEMPLATE = string.Template("""
+    <div class="success">
+        <h3>✅ Update Successful</h3>
+        <p>Your $object_type_lower has been updated successfully.</p>
+    </div>""")
+
+
+def _js_string(value: str) -> str:
+    """Quote a value as a JavaScript string literal that is safe inside a <script> block"""
+    return json.dumps(value).replace("<", "\\u003c")
+
+
+def _run_coroutine(coro) -> Any:
+    """
+    Run a coroutine on the shared handler loop and wait for its result
+    
+    Reusing one loop keeps the Graph API client's connection pool warm across
+    requests instead of building and tearing down a loop for each one.
+    """
+    global _handler_loop
+    
+    with _handler_loop_lock:
+        if _handler_loop is None:
+            _handler_loop = asyncio.new_event_loop()
+            threading.Thread(target=_handler_loop.run_forever, name="callback-handler-loop", daemon=True).start()
+    
+    return asyncio.run_coroutine_threadsafe(coro, _handler_loop).result()
 
 
 class CallbackHandler(BaseHTTPRequestHandler):
@@ -64,122 +556,38 @@ class CallbackHandler(BaseHTTPRequestHandler):
         """Handle the OAuth callback from Meta"""
         self.send_response(200)
         self.send_header("Content-type", "text/html")
+        self.send_header("Content-Length", str(len(_CALLBACK_HTML)))
         self.end_headers()
-        
-        callback_html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Authentication Successful</title>
-            <style>
-                body { 
-                    font-family: Arial, sans-serif; 
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }
-                .success { 
-                    color: #4CAF50;
-                    font-size: 24px;
-                    margin-bottom: 20px;
-                }
-                .info {
-                    background-color: #f5f5f5;
-                    padding: 15px;
-                    border-radius: 4px;
-                    margin-bottom: 20px;
-                }
-                .button {
-                    background-color: #4CAF50;
-                    color: white;
-                    padding: 10px 15px;
-                    border: none;
-                    border-radius: 4px;
-                    cursor: pointer;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="success">Authentication Successful!</div>
-            <div class="info">
-                <p>Your Meta Ads API token has been received.</p>
-                <p>You can now close this window and return to the application.</p>
-            </div>
-            <button class="button" onclick="window.close()">Close Window</button>
-            
-            <script>
-            // Function to parse URL parameters including fragments
-            function parseURL(url) {
-                var params = {};
-                var parser = document.createElement('a');
-                parser.href = url;
-                
-                // Parse fragment parameters
-                var fragment = parser.hash.substring(1);
-                var fragmentParams = fragment.split('&');
-                
-                for (var i = 0; i < fragmentParams.length; i++) {
-                    var pair = fragmentParams[i].split('=');
-                    params[pair[0]] = decodeURIComponent(pair[1]);
-                }
-                
-                return params;
-            }
-            
-            // Parse the URL to get the access token
-            var params = parseURL(window.location.href);
-            var token = params['access_token'];
-            var expires_in = params['expires_in'];
-            
-            // Send the token to the server
-            if (token) {
-                // Create XMLHttpRequest object
-                var xhr = new XMLHttpRequest();
-                
-                // Configure it to make a GET request to the /token endpoint
-                xhr.open('GET', '/token?token=' + encodeURIComponent(token) + 
-                              '&expires_in=' + encodeURIComponent(expires_in), true);
-                
-                // Set up a handler for when the request is complete
-                xhr.onload = function() {
-                    if (xhr.status === 200) {
-                        console.log('Token successfully sent to server');
-                    } else {
-                        console.error('Failed to send token to server');
-                    }
-                };
-                
-                // Send the request
-                xhr.send();
-            } else {
-                console.error('No token found in URL');
-                document.body.innerHTML += '<div style="color: red; margin-top: 20px;">Error: No authentication token found. Please try again.</div>';
-            }
-            </script>
-        </body>
-        </html>
-        """
-        self.wfile.write(callback_html.encode())
+        self.wfile.write(_CALLBACK_HTML)
     
     def _handle_token(self):
         """Handle the token received from the callback"""
-        # Extract token from query params
-        query = parse_qs(urlparse(self.path).query)
-        token_container["token"] = query.get("token", [""])[0]
+        # Extract token from query params. Only two keys are ever sent, so scan
+        # the query string directly rather than building a parse_qs dict.
+        token = ""
+        _, _, query = self.path.partition("?")
+        for pair in query.split("&"):
+            key, _, value = pair.partition("=")
+            if not value:
+                continue
+            if key == "token":
+                token = unquote_plus(value)
+            elif key == "expires_in":
+                try:
+                    token_container["expires_in"] = int(value)
+                except ValueError:
+                    token_container["expires_in"] = None
+        token_container["token"] = token
         
-        if "expires_in" in query:
-            try:
-                token_container["expires_in"] = int(query.get("expires_in", ["0"])[0])
-            except ValueError:
-                token_container["expires_in"] = None
+        if token_container["token"]:
+            token_received.set()
         
         # Send success response
         self.send_response(200)
         self.send_header("Content-type", "text/plain")
+        self.send_header("Content-Length", str(len(_TOKEN_RECEIVED)))
         self.end_headers()
-        self.wfile.write(b"Token received")
+        self.wfile.write(_TOKEN_RECEIVED)
 
         # The actual token processing is now handled by the auth module
         # that imports this module and accesses token_container
@@ -207,50 +615,9 @@ class CallbackHandler(BaseHTTPRequestHandler):
         self.send_header("Content-type", "text/html; charset=utf-8")
         self.end_headers()
         
-        # Create a properly escaped JSON string for JavaScript
-        escaped_changes = json.dumps(changes).replace("'", "\\'").replace('"', '\\"')
-        
-        html = """
-        <html>
-        <head>
-            <title>Confirm """ + object_type + """ Update</title>
-            <meta charset="utf-8">
-            <style>
-                body { font-family: Arial, sans-serif; margin: 20px; max-width: 1000px; margin: 0 auto; }
-                .warning { color: #d73a49; margin: 20px 0; padding: 15px; border-left: 4px solid #d73a49; background-color: #fff8f8; }
-                .changes { background: #f6f8fa; padding: 15px; border-radius: 6px; }
-                .buttons { margin-top: 20px; }
-                button { padding: 10px 20px; margin-right: 10px; border-radius: 6px; cursor: pointer; }
-                .approve { background: #2ea44f; color: white; border: none; }
-                .cancel { background: #d73a49; color: white; border: none; }
-                .diff-table { width: 100%; border-collapse: collapse; margin: 15px 0; }
-                .diff-table td { padding: 8px; border: 1px solid #ddd; }
-                .diff-table .header { background: #f1f8ff; font-weight: bold; }
-                .status { padding: 15px; margin-top: 20px; border-radius: 6px; display: none; }
-                .success { background-color: #e6ffed; border: 1px solid #2ea44f; color: #22863a; }
-                .error { background-color: #ffeef0; border: 1px solid #d73a49; color: #d73a49; }
-                pre { white-space: pre-wrap; word-break: break-all; }
-            </style>
-        </head>
-        <body>
-            <h1>Confirm """ + object_type + """ Update</h1>
-            <p>You are about to update """ + object_type + """: <strong>""" + object_id + """</strong></p>
-            
-            <div class="warning">
-                <p><strong>Warning:</strong> This action will directly update your """ + object_type.lower() + """ in Meta Ads. Please review the changes carefully before approving.</p>
-            </div>
-            
-            <div class="changes">
-                <h3>Changes to apply:</h3>
-                <table class="diff-table">
-                    <tr class="header">
-                        <td>Field</td>
-                        <td>New Value</td>
-                        <td>Description</td>
-                    </tr>
-                    """
-        
-        # Generate table rows for each change
+        # Fill the page template in one pass; values are escaped for the HTML or
+        # JavaScript context they land in
+        rows = []
         for k, v in changes_dict.items():
             description = ""
             if k == "frequency_control_specs" and isinstance(v, list) and len(v) > 0:
@@ -269,179 +636,24 @@ class CallbackHandler(BaseHTTPRequestHandler):
             
             # Format the value for display
             display_value = json.dumps(v, indent=2) if isinstance(v, (dict, list)) else str(v)
-            
-            html += f"""
-                    <tr>
-                        <td>{k}</td>
-                        <td><pre>{display_value}</pre></td>
-                        <td>{description}</td>
-                    </tr>
-                    """
-        
-        html += """
-                </table>
-            </div>
-            
-            <div class="buttons">
-                <button class="approve" onclick="approveChanges()">Approve Changes</button>
-                <button class="cancel" onclick="cancelChanges()">Cancel</button>
-            </div>
-            
-            <div id="status" class="status"></div>
-
-            <script>
-                // Get the approve button
-                const approveBtn = document.querySelector('.approve');
-                const cancelBtn = document.querySelector('.cancel');
-                const statusDiv = document.querySelector('.status');
-                
-                let debugMode = false;
-                // Function to log debug messages
-                function debugLog(...args) {
-                    if (debugMode) {
-                        console.log(...args);
-                    }
-                }
-                
-                // Add event listeners to buttons
-                approveBtn.addEventListener('click', approveChanges);
-                cancelBtn.addEventListener('click', cancelChanges);
-                
-                function showStatus(message, isError = false) {
-                    statusDiv.textContent = message;
-                    statusDiv.style.display = 'block';
-                    statusDiv.className = 'status ' + (isError ? 'error' : 'success');
-                }
-                
-                function approveChanges() {
-                    // Disable buttons to prevent double-submission
-                    const buttons = [approveBtn, cancelBtn];
-                    buttons.forEach(button => button.disabled = true);
-                    
-                    showStatus('Approving changes...');
-                    
-                    // Determine which object type we're updating
-                    const isAd = Boolean('""" + ad_id + """'); 
-                    const objectType = isAd ? 'ad' : 'adset';
-                    const objectId = '""" + object_id + """';
-                    
-                    // Create parameters
-                    const params = new URLSearchParams({
-                        action: 'approve',
-                        token: '""" + token + """',
-                        changes: '""" + escaped_changes + """'
-                    });
-                    
-                    // Add the appropriate ID parameter based on object type
-                    if (isAd) {
-                        params.append('ad_id', objectId);
-                    } else {
-                        params.append('adset_id', objectId);
-                    }
-                    
-                    debugLog("Sending update request with params", {
-                        objectType,
-                        objectId,
-                        changes: JSON.parse('""" + escaped_changes + """')
-                    });
-                    
-                    fetch('/update-confirm?' + params)
-                    .then(response => response.json())
-                    .then(data => {
-                        debugLog("Update response data", data);
-                        buttons.forEach(button => button.disabled = false);
-                        
-                        // Handle result
-                        if (data.status === 'error') {
-                            let errorMessage = data.error || 'Unknown error';
-                            const originalErrorDetails = data.api_error || {};
-                            
-                            showStatus('Error: ' + errorMessage, true);
-                            
-                            // Create a detailed error object for the verification page
-                            const fullErrorData = {
-                                message: errorMessage,
-                                details: data.errorDetails || [],
-                                apiError: originalErrorDetails || data.apiError || {},
-                                fullResponse: data.fullResponse || {}
-                            };
-                            
-                            debugLog("Redirecting with error message", errorMessage);
-                            debugLog("Full error data", fullErrorData);
-                            
-                            // Encode the stringified error object
-                            const encodedErrorData = encodeURIComponent(JSON.stringify(fullErrorData));
-                            
-                            // Redirect to verification page with detailed error information
-                            const errorParams = new URLSearchParams({
-                                token: '""" + token + """',
-                                error: errorMessage,
-                                errorData: encodedErrorData
-                            });
-                            
-                            // Add the appropriate ID parameter based on object type
-                            if (isAd) {
-                                errorParams.append('ad_id', objectId);
-                            } else {
-                                errorParams.append('adset_id', objectId);
-                            }
-                            
-                            window.location.href = '/verify-update?' + errorParams;
-                        } else {
-                            showStatus('Changes approved and will be applied shortly!');
-                            setTimeout(() => {
-                                const verifyParams = new URLSearchParams({
-                                    token: '""" + token + """'
-                                });
-                                
-                                // Add the appropriate ID parameter based on object type
-                                if (isAd) {
-                                    verifyParams.append('ad_id', objectId);
-                                } else {
-                                    verifyParams.append('adset_id', objectId);
-                                }
-                                
-                                window.location.href = '/verify-update?' + verifyParams;
-                            }, 3000);
-                        }
-                    })
-                    .catch(error => {
-                        debugLog("Fetch error", error);
-                        showStatus('Error applying changes: ' + error, true);
-                        buttons.forEach(button => button.disabled = false);
-                    });
-                }
-                
-                function cancelChanges() {
-                    showStatus("Cancelling update...");
-                    
-                    // Determine which object type we're updating
-                    const isAd = Boolean('""" + ad_id + """'); 
-                    const objectId = '""" + object_id + """';
-                    
-                    // Create parameters
-                    const params = new URLSearchParams({
-                        action: 'cancel'
-                    });
-                    
-                    // Add the appropriate ID parameter based on object type
-                    if (isAd) {
-                        params.append('ad_id', objectId);
-                    } else {
-                        params.append('adset_id', objectId);
-                    }
-                    
-                    fetch('/update-confirm?' + params)
-                    .then(() => {
-                        showStatus('Update cancelled.');
-                        setTimeout(() => window.close(), 2000);
-                    });
-                }
-            </script>
-        </body>
-        </html>
-        """
-        self.wfile.write(html.encode('utf-8'))
+            rows.append(_CHANGE_ROW_TEMPLATE.substitute(
+                field=html.escape(k),
+                value=html.escape(display_value),
+                description=html.escape(description)
+            ))
+        
+        page = _CONFIRM_UPDATE_TEMPLATE.substitute(
+            object_type=html.escape(object_type),
+            object_type_lower=html.escape(object_type.lower()),
+            object_id=html.escape(object_id),
+            rows="".join(rows),
+            ad_id_js=_js_string(ad_id),
+            object_id_js=_js_string(object_id),
+            token_js=_js_string(token),
+            # The page sends the changes JSON-encoded once more, as _perform_update expects
+            changes_js=_js_string(json.dumps(changes))
+        )
+        self.wfile.write(page.encode('utf-8'))
     
     def _handle_update_execution(self):
         """Handle the update execution after user confirmation"""
@@ -474,7 +686,7 @@ class CallbackHandler(BaseHTTPRequestHandler):
             })
             
             # Process the update asynchronously
-            result = asyncio.run(self._perform_update(object_id, token, changes))
+            result = _run_coroutine(self._perform_update(object_id, token, changes))
             self.wfile.write(json.dumps(result).encode())
         else:
             # Store the cancellation
@@ -509,7 +721,7 @@ class CallbackHandler(BaseHTTPRequestHandler):
                     try:
                         changes_dict = json.loads(decoded_changes)
                         break
-                    except:
+                    except json.JSONDecodeError:
                         # Failed to parse, will try again in the next iteration
                         pass
             else:
@@ -521,12 +733,9 @@ class CallbackHandler(BaseHTTPRequestHandler):
             # Create API parameters properly
             api_params = {}
             
-            # Add each change parameter
+            # Add each change parameter; make_api_request sends the token itself
             for key, value in changes_dict.items():
                 api_params[key] = value
-                
-            # Add the access token
-            api_params["access_token"] = token
             
             # Log what we're about to send
             object_type = "ad set" if object_id.startswith("23") else "ad"  # Simple heuristic based on ID prefix
@@ -599,7 +808,7 @@ class CallbackHandler(BaseHTTPRequestHandler):
                     result_obj = json.loads(result)
                     if isinstance(result_obj, dict) and 'error' in result_obj:
                         return {"status": "error", "error": result_obj['error'].get('message', 'Unknown API error')}
-                except:
+                except (ValueError, AttributeError):
                     # If not parseable as JSON, return as error message
                     return {"status": "error", "error": result}
             
@@ -607,9 +816,7 @@ class CallbackHandler(BaseHTTPRequestHandler):
             return {"status": "approved", "api_result": result}
         except Exception as e:
             # Log the exception for debugging
-            logger.error(f"Error in perform_update: {str(e)}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception("Error in perform_update: %s", e)
             return {"status": "error", "error": str(e)}
     
     def _handle_update_verification(self):
@@ -636,166 +843,38 @@ class CallbackHandler(BaseHTTPRequestHandler):
         self.send_header("Content-type", "text/html; charset=utf-8")
         self.end_headers()
         
-        html = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Verification - """ + object_type + """ Update</title>
-            <meta charset="utf-8">
-            <style>
-                body { 
-                    font-family: Arial, sans-serif; 
-                    margin: 20px; 
-                    max-width: 1000px; 
-                    margin: 0 auto;
-                    line-height: 1.6;
-                }
-                .header { 
-                    margin-bottom: 20px; 
-                    padding-bottom: 10px; 
-                    border-bottom: 1px solid #ccc; 
-                }
-                .success { 
-                    color: #2ea44f; 
-                    background-color: #e6ffed; 
-                    padding: 15px; 
-                    border-radius: 6px; 
-                    margin: 20px 0; 
-                }
-                .error { 
-                    color: #d73a49; 
-                    background-color: #ffeef0; 
-                    padding: 15px; 
-                    border-radius: 6px; 
-                    margin: 20px 0; 
-                }
-                .details { 
-                    background: #f6f8fa; 
-                    padding: 15px; 
-                    border-radius: 6px; 
-                    margin: 20px 0; 
-                }
-                .btn {
-                    display: inline-block;
-                    padding: 10px 20px;
-                    background-color: #0366d6;
-                    color: white;
-                    border-radius: 6px;
-                    text-decoration: none;
-                    margin-top: 20px;
-                }
-                pre {
-                    white-space: pre-wrap;
-                    word-break: break-word;
-                    background: #f8f8f8;
-                    padding: 10px;
-                    border-radius: 4px;
-                    overflow: auto;
-                }
-                #currentDetails {
-                    display: none;
-                    margin-top: 20px;
-                }
-                .toggle-btn {
-                    background-color: #f1f8ff;
-                    border: 1px solid #c8e1ff;
-                    padding: 8px 16px;
-                    border-radius: 4px;
-                    cursor: pointer;
-                    margin-top: 20px;
-                    display: inline-block;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>""" + object_type + """ Update Verification</h1>
-                <p>Object ID: <strong>""" + object_id + """</strong></p>
-            </div>
-        """
-        
-        # If there's an error message, display it
+        # If there's an error message, display it; otherwise report success
         if error_message:
-            html += """
-            <div class="error">
-                <h3>❌ Update Failed</h3>
-                <p><strong>Error:</strong> """ + error_message + """</p>
-            """
+            error_details = ""
             
             # If there's detailed error data, decode and display it
             if error_data_encoded:
                 try:
-                    error_data = json.loads(urllib.parse.unquote(error_data_encoded))
-                    html += """
-                    <div class="details">
-                        <h4>Error Details:</h4>
-                        <pre>""" + json.dumps(error_data, indent=2) + """</pre>
-                    </div>
-                    """
-                except:
+                    error_data = json.loads(unquote(error_data_encoded))
+                    error_details = _ERROR_DETAILS_TEMPLATE.substitute(
+                        details=html.escape(json.dumps(error_data, indent=2))
+                    )
+                except ValueError:
                     pass
             
-            html += """</div>"""
+            status = _UPDATE_FAILED_TEMPLATE.substitute(
+                error_message=html.escape(error_message),
+                error_details=error_details
+            )
         else:
-            # No error, display success message
-            html += """
-            <div class="success">
-                <h3>✅ Update Successful</h3>
-                <p>Your """ + object_type.lower() + """ has been updated successfully.</p>
-            </div>
-            """
-        
-        # Add JavaScript to fetch the current details of the ad/adset
-        html += """
-        <button class="toggle-btn" id="toggleDetails">Show Current Details</button>
-        <div id="currentDetails">
-            <h3>Current """ + object_type + """ Details:</h3>
-            <pre id="detailsJson">Loading...</pre>
-        </div>
-        
-        <a href="#" class="btn" onclick="window.close()">Close Window</a>
-        
-        <script>
-            document.getElementById('toggleDetails').addEventListener('click', function() {
-                const detailsDiv = document.getElementById('currentDetails');
-                const toggleBtn = document.getElementById('toggleDetails');
-                
-                if (detailsDiv.style.display === 'block') {
-                    detailsDiv.style.display = 'none';
-                    toggleBtn.textContent = 'Show Current Details';
-                } else {
-                    detailsDiv.style.display = 'block';
-                    toggleBtn.textContent = 'Hide Current Details';
-                    
-                    // Fetch current details if not already loaded
-                    if (document.getElementById('detailsJson').textContent === 'Loading...') {
-                        fetchCurrentDetails();
-                    }
-                }
-            });
-            
-            function fetchCurrentDetails() {
-                const objectId = '""" + object_id + """';
-                const objectType = '""" + object_type.lower() + """';
-                const endpoint = objectType === 'ad' ? 
-                    `/api/ad?ad_id=${objectId}&token=""" + token + """` : 
-                    `/api/adset?adset_id=${objectId}&token=""" + token + """`;
-                
-                fetch(endpoint)
-                    .then(response => response.json())
-                    .then(data => {
-                        document.getElementById('detailsJson').textContent = JSON.stringify(data, null, 2);
-                    })
-                    .catch(error => {
-                        document.getElementById('detailsJson').textContent = `Error fetching details: ${error}`;
-                    });
-            }
-        </script>
-        </body>
-        </html>
-        """
+            status = _UPDATE_SUCCEEDED_TEMPLATE.substitute(
+                object_type_lower=html.escape(object_type.lower())
+            )
         
-        self.wfile.write(html.encode('utf-8'))
+        page = _VERIFY_UPDATE_TEMPLATE.substitute(
+            object_type=html.escape(object_type),
+            object_id=html.escape(object_id),
+            status=status,
+            object_id_js=_js_string(object_id),
+            object_type_js=_js_string(object_type.lower()),
+            token_url=quote(token, safe="")
+        )
+        self.wfile.write(page.encode('utf-8'))
     
     def _handle_adset_api(self):
         """Handle API requests for adset data"""
@@ -804,42 +883,18 @@ class CallbackHandler(BaseHTTPRequestHandler):
         adset_id = query.get("adset_id", [""])[0]
         token = query.get("token", [""])[0]
         
-        from .api import make_api_request
+        # Imported here since adsets imports this module
+        from .adsets import _get_adset_details
         
-        # Call the Graph API directly
+        # Fetch the details as a dict so they're only serialized once, for the response
         async def get_adset_data():
             try:
-                endpoint = f"{adset_id}"
-                params = {
-                    "fields": "id,name,campaign_id,status,daily_budget,lifetime_budget,targeting,bid_amount,bid_strategy,optimization_goal,billing_event,start_time,end_time,created_time,updated_time,attribution_spec,destination_type,promoted_object,pacing_type,budget_remaining,frequency_control_specs"
-                }
-                
-                result = await make_api_request(endpoint, token, params)
-                
-                # Check if result is a string (possibly an error message)
-                if isinstance(result, str):
-                    try:
-                        # Try to parse as JSON
-                        parsed_result = json.loads(result)
-                        return parsed_result
-                    except json.JSONDecodeError:
-                        # Return error object if can't parse as JSON
-                        return {"error": {"message": result}}
-                        
-                # If the result is None, return an error object
-                if result is None:
-                    return {"error": {"message": "Empty response from API"}}
-                    
-                return result
+                return await _get_adset_details(adset_id, token)
             except Exception as e:
                 logger.error(f"Error in get_adset_data: {str(e)}")
                 return {"error": {"message": f"Error fetching ad set data: {str(e)}"}}
         
-        # Run the async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(get_adset_data())
-        loop.close()
+        result = _run_coroutine(get_adset_data())
         
         # Return the result
         self.send_response(200)
@@ -864,8 +919,7 @@ class CallbackHandler(BaseHTTPRequestHandler):
             }
             return await make_api_request(endpoint, token, params)
         
-        # Run the async function to get data
-        result = asyncio.run(get_ad_data())
+        result = _run_coroutine(get_ad_data())
         
         # Send the response
         self.send_response(200)
@@ -886,30 +940,91 @@ def shutdown_callback_server():
     """
     Shutdown the callback server if it's running
     """
-    global callback_server_thread, callback_server_running, callback_server_port, callback_server_instance, server_shutdown_timer
+    global callback_server_running
     
     with callback_server_lock:
         if not callback_server_running:
             print("Callback server is not running")
             return
         
-        if server_shutdown_timer is not None:
-            server_shutdown_timer.cancel()
-            server_shutdown_timer = None
+        callback_server_running = False
+        _stop_callback_server()
+
+
+def _stop_callback_server() -> None:
+    """Tear down the server instance; callers must hold callback_server_lock"""
+    global callback_server_instance, server_shutdown_timer
+    
+    if server_shutdown_timer is not None:
+        server_shutdown_timer.cancel()
+        server_shutdown_timer = None
+    
+    print(f"Shutting down callback server on port {callback_server_port}")
+    
+    # Shutdown the server if it exists
+    if callback_server_instance:
+        try:
+            callback_server_instance.shutdown()
+            callback_server_instance = None
+            print("Callback server has been shut down")
+        except Exception as e:
+            print(f"Error shutting down callback server: {e}")
+    else:
+        print("No server instance to shut down")
+
+
+def _schedule_idle_check(delay: float) -> None:
+    """Arm the idle-shutdown timer; callers must hold callback_server_lock"""
+    global server_shutdown_timer
+    
+    if server_shutdown_timer is not None:
+        server_shutdown_timer.cancel()
+    
+    server_shutdown_timer = threading.Timer(delay, _shutdown_if_idle)
+    server_shutdown_timer.daemon = True
+    server_shutdown_timer.start()
+
+
+def _shutdown_if_idle() -> None:
+    """Shut the server down once it has gone CALLBACK_SERVER_TIMEOUT seconds without use"""
+    global callback_server_running
+    
+    with callback_server_lock:
+        if not callback_server_running:
+            return
         
-        print(f"Shutting down callback server on port {callback_server_port}")
+        # Clear the flag before checking idleness: start_callback_server's lock-free
+        # fast path records activity and then reads the flag, so it either refreshed
+        # the activity in time for this check or falls through to the locked path
+        callback_server_running = False
+        idle = time.monotonic() - callback_server_last_activity
+        if idle < CALLBACK_SERVER_TIMEOUT:
+            # Used since the timer was armed; check again when the remaining idle window ends
+            callback_server_running = True
+            _schedule_idle_check(CALLBACK_SERVER_TIMEOUT - idle)
+            return
         
-        # Shutdown the server if it exists
-        if callback_server_instance:
-            try:
-                callback_server_instance.shutdown()
-                callback_server_instance = None
-                callback_server_running = False
-                print("Callback server has been shut down")
-            except Exception as e:
-                print(f"Error shutting down callback server: {e}")
-        else:
-            print("No server instance to shut down")
+        _stop_callback_server()
+
+
+def _bind_callback_server() -> HTTPServer:
+    """
+    Bind the callback server, preferring the ports the OAuth redirect normally uses
+    
+    Returns:
+        HTTPServer already bound and listening
+    """
+    # Binding the real server directly avoids a probe-then-rebind race on the port
+    for port in range(CALLBACK_SERVER_PORT, CALLBACK_SERVER_PORT + CALLBACK_SERVER_PORT_ATTEMPTS):
+        try:
+            return HTTPServer(('localhost', port), CallbackHandler)
+        except OSError:
+            logger.debug("Callback port %s is in use", port)
+    
+    # Every preferred port is taken, so let the OS pick a free one
+    logger.warning("No preferred callback port available, using an OS-assigned port")
+    return HTTPServer(('localhost', 0), CallbackHandler)
+
 
 def start_callback_server() -> int:
     """
@@ -918,95 +1033,58 @@ def start_callback_server() -> int:
     Returns:
         Port number the server is running on
     """
-    global callback_server_thread, callback_server_running, callback_server_port, callback_server_instance, server_shutdown_timer
+    global callback_server_thread, callback_server_running, callback_server_port, callback_server_instance, server_shutdown_timer, callback_server_last_activity
+    
+    # Fast path: when the server is up, recording activity pushes back the idle
+    # shutdown without taking the lock or re-arming the timer
+    callback_server_last_activity = time.monotonic()
+    if callback_server_running:
+        return callback_server_port
     
     with callback_server_lock:
         if callback_server_running:
-            print(f"Callback server already running on port {callback_server_port}")
-            
-            # Reset the shutdown timer if one exists
-            if server_shutdown_timer is not None:
-                server_shutdown_timer.cancel()
-            
-            server_shutdown_timer = threading.Timer(CALLBACK_SERVER_TIMEOUT, shutdown_callback_server)
-            server_shutdown_timer.daemon = True
-            server_shutdown_timer.start()
-            print(f"Reset server shutdown timer to {CALLBACK_SERVER_TIMEOUT} seconds")
-            
+            logger.debug("Callback server already running on port %s", callback_server_port)
             return callback_server_port
         
-        # Find an available port
-        port = 8888
-        max_attempts = 10
-        for attempt in range(max_attempts):
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('localhost', port))
-                    break
-            except OSError:
-                port += 1
-                if attempt == max_attempts - 1:
-                    raise Exception(f"Could not find an available port after {max_attempts} attempts")
-        
-        callback_server_port = port
-        
+        # Only the slow path takes the lock, and it holds it just for the bind and
+        # thread start. HTTPServer binds and listens in its constructor, so the OS
+        # queues connections before serve_forever starts and there is nothing to wait for.
         try:
             # Create and start server in a daemon thread
-            server = HTTPServer(('localhost', port), CallbackHandler)
+            server = _bind_callback_server()
+            port = server.server_address[1]
+            callback_server_port = port
             callback_server_instance = server
-            print(f"Callback server starting on port {port}")
-            
-            # Create a simple flag to signal when the server is ready
-            server_ready = threading.Event()
+            logger.debug("Callback server starting on port %s", port)
             
             def server_thread():
                 try:
-                    # Signal that the server thread has started
-                    server_ready.set()
-                    print(f"Callback server is now ready on port {port}")
+                    logger.debug("Callback server is now ready on port %s", port)
                     # Start serving HTTP requests
                     server.serve_forever()
                 except Exception as e:
-                    print(f"Server error: {e}")
+                    logger.error("Server error: %s", e)
                 finally:
                     with callback_server_lock:
-                        global callback_server_running
-                        callback_server_running = False
+                        global callback_server_running, callback_server_instance
+                        # Only clear the state if it still belongs to this server,
+                        # not one started after it was shut down
+                        if callback_server_instance is server:
+                            callback_server_running = False
+                            callback_server_instance = None
             
             callback_server_thread = threading.Thread(target=server_thread)
             callback_server_thread.daemon = True
             callback_server_thread.start()
             
-            # Wait for server to be ready (up to 5 seconds)
-            if not server_ready.wait(timeout=5):
-                print("Warning: Timeout waiting for server to start, but continuing anyway")
-            
             callback_server_running = True
             
-            # Set a timer to shutdown the server after CALLBACK_SERVER_TIMEOUT seconds
-            if server_shutdown_timer is not None:
-                server_shutdown_timer.cancel()
-            
-            server_shutdown_timer = threading.Timer(CALLBACK_SERVER_TIMEOUT, shutdown_callback_server)
-            server_shutdown_timer.daemon = True
-            server_shutdown_timer.start()
-            print(f"Server will automatically shut down after {CALLBACK_SERVER_TIMEOUT} seconds of inactivity")
+            # Set a timer to shutdown the server after CALLBACK_SERVER_TIMEOUT seconds of inactivity
+            _schedule_idle_check(CALLBACK_SERVER_TIMEOUT)
+            logger.debug("Server will automatically shut down after %s seconds of inactivity", CALLBACK_SERVER_TIMEOUT)
             
-            # Verify the server is actually accepting connections
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.settimeout(2)
-                    s.connect(('localhost', port))
-                print(f"Confirmed server is accepting connections on port {port}")
-            except Exception as e:
-                print(f"Warning: Could not verify server connection: {e}")
-                
             return port
             
         except Exception as e:
-            print(f"Error starting callback server: {e}")
-            # Try again with a different port in case of bind issues
-            if "address already in use" in str(e).lower():
-                print("Port may be in use, trying a different port...")
-                return start_callback_server()  # Recursive call with a new port
+            logger.error("Error starting callback server: %s", e)
             raise e 
\ No newline at end of file
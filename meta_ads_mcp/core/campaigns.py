@@ -2,9 +2,14 @@
 
 import json
 from typing import List, Optional, Dict, Any, Union
-from .api import meta_api_tool, make_api_request
-from .accounts import get_ad_accounts
+from .api import meta_api_tool, make_api_request_with_backoff
+from .accounts import _get_ad_accounts
 from .server import mcp_server
+from .utils import json_dumps
+
+# Graph API field selections shared across the campaign tools
+_CAMPAIGN_FIELDS = "id,name,objective,status,daily_budget,lifetime_budget,buying_type,start_time,stop_time,created_time,updated_time,bid_strategy"
+_CAMPAIGN_DETAIL_FIELDS = _CAMPAIGN_FIELDS + ",special_ad_categories,special_ad_category_country,budget_remaining,configured_status"
 
 
 @mcp_server.tool()
@@ -29,17 +34,17 @@ async def get_campaigns(access_token: str = None, account_id: str = None, limit:
     """
     # If no account ID is specified, try to get the first one for the user
     if not account_id:
-        accounts_json = await get_ad_accounts("me", json.dumps({"limit": 1}), access_token)
-        accounts_data = json.loads(accounts_json)
+        # Only the first account's ID is needed
+        accounts_data = await _get_ad_accounts(access_token, "me", 1, fields="id")
         
         if "data" in accounts_data and accounts_data["data"]:
             account_id = accounts_data["data"][0]["id"]
         else:
-            return json.dumps({"error": "No account ID specified and no accounts found for user"}, indent=2)
+            return json_dumps({"error": "No account ID specified and no accounts found for user"})
     
     endpoint = f"{account_id}/campaigns"
     params = {
-        "fields": "id,name,objective,status,daily_budget,lifetime_budget,buying_type,start_time,stop_time,created_time,updated_time,bid_strategy",
+        "fields": _CAMPAIGN_FIELDS,
         "limit": limit
     }
     
@@ -47,9 +52,9 @@ async def get_campaigns(access_token: str = None, account_id: str = None, limit:
         # API expects an array, encode it as a JSON string
         params["effective_status"] = json.dumps([status_filter])
     
-    data = await make_api_request(endpoint, access_token, params)
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
     
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -67,16 +72,16 @@ async def get_campaign_details(access_token: str = None, campaign_id: str = None
         campaign_id: Meta Ads campaign ID
     """
     if not campaign_id:
-        return json.dumps({"error": "No campaign ID provided"}, indent=2)
+        return json_dumps({"error": "No campaign ID provided"})
     
     endpoint = f"{campaign_id}"
     params = {
-        "fields": "id,name,objective,status,daily_budget,lifetime_budget,buying_type,start_time,stop_time,created_time,updated_time,bid_strategy,special_ad_categories,special_ad_category_country,budget_remaining,configured_status"
+        "fields": _CAMPAIGN_DETAIL_FIELDS
     }
     
-    data = await make_api_request(endpoint, access_token, params)
+    data = await make_api_request_with_backoff(endpoint, access_token, params)
     
-    return json.dumps(data, indent=2)
+    return json_dumps(data)
 
 
 @mcp_server.tool()
@@ -118,13 +123,13 @@ async def create_campaign(
     """
     # Check required parameters
     if not account_id:
-        return json.dumps({"error": "No account ID provided"}, indent=2)
+        return json_dumps({"error": "No account ID provided"})
     
     if not name:
-        return json.dumps({"error": "No campaign name provided"}, indent=2)
+        return json_dumps({"error": "No campaign name provided"})
         
     if not objective:
-        return json.dumps({"error": "No campaign objective provided"}, indent=2)
+        return json_dumps({"error": "No campaign objective provided"})
     
     # Special_ad_categories is required by the API, set default if not provided
     if special_ad_categories is None:
@@ -170,15 +175,15 @@ async def create_campaign(
         params["ab_test_control_setups"] = json.dumps(ab_test_control_setups)
     
     try:
-        data = await make_api_request(endpoint, access_token, params, method="POST")
-        return json.dumps(data, indent=2)
+        data = await make_api_request_with_backoff(endpoint, access_token, params, method="POST")
+        return json_dumps(data)
     except Exception as e:
         error_msg = str(e)
-        return json.dumps({
+        return json_dumps({
             "error": "Failed to create campaign",
             "details": error_msg,
             "params_sent": params
-        }, indent=2)
+        })
 
 
 @mcp_server.tool()
@@ -216,7 +221,7 @@ async def update_campaign(
         objective: New campaign objective (Note: May not always be updatable)
     """
     if not campaign_id:
-        return json.dumps({"error": "No campaign ID provided"}, indent=2)
+        return json_dumps({"error": "No campaign ID provided"})
 
     endpoint = f"{campaign_id}"
     
@@ -247,17 +252,17 @@ async def update_campaign(
         params["objective"] = objective # Caution: Objective changes might reset learning or be restricted
 
     if not params:
-        return json.dumps({"error": "No update parameters provided"}, indent=2)
+        return json_dumps({"error": "No update parameters provided"})
 
     try:
         # Use POST method for updates as per Meta API documentation
-        data = await make_api_request(endpoint, access_token, params, method="POST")
-        return json.dumps(data, indent=2)
+        data = await make_api_request_with_backoff(endpoint, access_token, params, method="POST")
+        return json_dumps(data)
     except Exception as e:
         error_msg = str(e)
         # Include campaign_id in error for better context
-        return json.dumps({
+        return json_dumps({
             "error": f"Failed to update campaign {campaign_id}",
             "details": error_msg,
             "params_sent": params # Be careful about logging sensitive data if any
-        }, indent=2) 
\ No newline at end of file
+        }) 
\ No newline at end of file
@@ -2,12 +2,16 @@
 
 import json
 from typing import Optional, Union, Dict
-from .api import meta_api_tool, make_api_request
-from .utils import download_image, try_multiple_download_methods, ad_creative_images, create_resource_from_image
+from .api import meta_api_tool, make_api_request_with_backoff
+from .utils import json_dumps, HTTP_TIMEOUT, download_image, try_multiple_download_methods, ad_creative_images, create_resource_from_image
 from .server import mcp_server
+from .ads import _resolve_ad_creative, _get_image_url
 import base64
 import datetime
 
+# Metrics requested by get_insights
+_INSIGHTS_FIELDS = "account_id,account_name,campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,impressions,clicks,spend,cpc,cpm,ctr,reach,frequency,actions,conversions,unique_clicks,cost_per_action_type"
+
 
 @mcp_server.tool()
 @meta_api_tool
@@ -29,11 +33,11 @@ async def get_insights(access_token: str = None, object_id: str = None,
         level: Level of aggregation (ad, adset, campaign, account)
     """
     if not object_id:
-        return json.dumps({"error": "No object ID provided"}, indent=2)
+        return json_dumps({"error": "No object ID provided"})
         
     endpoint = f"{object_id}/insights"
     params = {
-        "fields": "account_id,account_name,campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,impressions,clicks,spend,cpc,cpm,ctr,reach,frequency,actions,conversions,unique_clicks,cost_per_action_type",
+        "fields": _INSIGHTS_FIELDS,
         "level": level
     }
     
@@ -43,7 +47,7 @@ async def get_insights(access_token: str = None, object_id: str = None,
         if "since" in time_range and "until" in time_range:
             params["time_range"] = json.dumps(time_range)
         else:
-            return json.dumps({"error": "Custom time_range must contain both 'since' and 'until' keys in YYYY-MM-DD format"}, indent=2)
+            return json_dumps({"error": "Custom time_range must contain both 'since' and 'until' keys in YYYY-MM-DD format"})
     else:
         # Use preset date range
         params["date_preset"] = time_range
@@ -51,9 +55,9 @@ async def get_insights(access_token: str = None, object_id: str = None,
     if breakdown:
         params["breakdowns"] = breakdown
     
-    data = await make_api_request(endpoint, access_token, params)
-    
-    return json.dumps(data, indent=2)
+    # Insights payloads can be large; return the dict and let meta_api_tool
+    # serialize it once
+    return await make_api_request_with_backoff(endpoint, access_token, params)
 
 
 @mcp_server.tool()
@@ -92,10 +96,10 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
             url = creative_data.get("thumbnail_url")
     
     if not url:
-        return json.dumps({
+        return json_dumps({
             "error": "No image URL provided or found in ad creative",
             "results": results
-        }, indent=2)
+        })
     
     results["image_url"] = url
     
@@ -128,7 +132,7 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
         }
         import httpx
         async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
+            response = await client.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             method_result["status_code"] = response.status_code
             method_result["headers"] = dict(response.headers)
             
@@ -164,7 +168,7 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
         
         import httpx
         async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
+            response = await client.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             method_result["status_code"] = response.status_code
             method_result["headers"] = dict(response.headers)
             
@@ -200,7 +204,7 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
             if potential_ids:
                 attachment_id = potential_ids[0]
                 endpoint = f"{attachment_id}?fields=url,width,height"
-                api_result = await make_api_request(endpoint, access_token)
+                api_result = await make_api_request_with_backoff(endpoint, access_token)
                 
                 method_result["api_response"] = api_result
                 
@@ -211,7 +215,7 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
                     # Try to download from this Graph API URL
                     import httpx
                     async with httpx.AsyncClient() as client:
-                        response = await client.get(graph_url, timeout=30.0)
+                        response = await client.get(graph_url, timeout=HTTP_TIMEOUT)
                         
                         method_result["status_code"] = response.status_code
                         if response.status_code == 200:
@@ -243,7 +247,7 @@ async def debug_image_download(access_token: str = None, url: str = "", ad_id: s
         else:
             results["recommendation"] = "Network or other technical errors detected. Check URL expiration or CDN restrictions."
     
-    return json.dumps(results, indent=2)
+    return json_dumps(results)
 
 
 @mcp_server.tool()
@@ -258,51 +262,17 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
         ad_id: Meta Ads ad ID
     """
     if not ad_id:
-        return json.dumps({"error": "No ad ID provided"}, indent=2)
+        return json_dumps({"error": "No ad ID provided"})
         
-    # First get the ad's creative ID
-    endpoint = f"{ad_id}"
-    params = {
-        "fields": "creative,account_id"
-    }
+    # Resolve the creative and its image hashes with the same lookup the ad image tools use
+    resolved = await _resolve_ad_creative(ad_id, access_token)
     
-    ad_data = await make_api_request(endpoint, access_token, params)
+    if "error" in resolved:
+        return json_dumps({"error": resolved["error"]})
     
-    if "error" in ad_data:
-        return json.dumps({
-            "error": "Could not get ad data",
-            "details": ad_data
-        }, indent=2)
-    
-    if "creative" not in ad_data or "id" not in ad_data["creative"]:
-        return json.dumps({
-            "error": "No creative ID found for this ad",
-            "ad_data": ad_data
-        }, indent=2)
-    
-    creative_id = ad_data["creative"]["id"]
-    account_id = ad_data.get("account_id", "")
-    
-    # Now get the creative object
-    creative_endpoint = f"{creative_id}"
-    creative_params = {
-        "fields": "id,name,thumbnail_url,image_hash,asset_feed_spec"
-    }
-    
-    creative_data = await make_api_request(creative_endpoint, access_token, creative_params)
-    
-    if "error" in creative_data:
-        return json.dumps({
-            "error": "Could not get creative data",
-            "details": creative_data
-        }, indent=2)
-    
-    # Approach 1: Try to get image through adimages endpoint if we have image_hash
-    image_hash = None
-    if "image_hash" in creative_data:
-        image_hash = creative_data["image_hash"]
-    elif "asset_feed_spec" in creative_data and "images" in creative_data["asset_feed_spec"] and len(creative_data["asset_feed_spec"]["images"]) > 0:
-        image_hash = creative_data["asset_feed_spec"]["images"][0].get("hash")
+    creative_id = resolved["creative_id"]
+    account_id = resolved["account_id"]
+    image_hashes = resolved["image_hashes"]
     
     result = {
         "ad_id": ad_id,
@@ -310,7 +280,9 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
         "attempts": []
     }
     
-    if image_hash and account_id:
+    # Approach 1: Try to get image through adimages endpoint if we have image_hash
+    # (the other approaches only need the creative, so they still run without an account)
+    if image_hashes and account_id:
         attempt = {
             "method": "adimages endpoint with hash",
             "success": False
@@ -318,15 +290,11 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
         result["attempts"].append(attempt)
         
         try:
-            image_endpoint = f"act_{account_id}/adimages"
-            image_params = {
-                "hashes": [image_hash]
-            }
-            image_data = await make_api_request(image_endpoint, access_token, image_params)
-            attempt["response"] = image_data
+            lookup = await _get_image_url(account_id, image_hashes, access_token)
+            attempt["response"] = lookup
             
-            if "data" in image_data and len(image_data["data"]) > 0 and "url" in image_data["data"][0]:
-                url = image_data["data"][0]["url"]
+            if "image_url" in lookup:
+                url = lookup["image_url"]
                 attempt["url"] = url
                 
                 # Try to download the image
@@ -361,7 +329,7 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
     try:
         thumbnails_endpoint = f"{creative_id}/thumbnails"
         thumbnails_params = {}
-        thumbnails_data = await make_api_request(thumbnails_endpoint, access_token, thumbnails_params)
+        thumbnails_data = await make_api_request_with_backoff(thumbnails_endpoint, access_token, thumbnails_params)
         attempt["response"] = thumbnails_data
         
         if "data" in thumbnails_data and len(thumbnails_data["data"]) > 0:
@@ -409,7 +377,7 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
         ad_preview_params = {
             "fields": "preview_shareable_link"
         }
-        ad_preview_data = await make_api_request(ad_preview_endpoint, access_token, ad_preview_params)
+        ad_preview_data = await make_api_request_with_backoff(ad_preview_endpoint, access_token, ad_preview_params)
         
         if "preview_shareable_link" in ad_preview_data:
             preview_link = ad_preview_data["preview_shareable_link"]
@@ -426,4 +394,4 @@ async def save_ad_image_via_api(access_token: str = None, ad_id: str = None) ->
     else:
         result["message"] = "Failed to retrieve ad image through any API method"
         
-    return json.dumps(result, indent=2) 
\ No newline at end of file
+    return json_dumps(result) 
\ No newline at end of file
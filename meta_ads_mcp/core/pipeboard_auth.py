@@ -5,13 +5,8 @@ import json
 import time
 import requests
 from pathlib import Path
-import platform
 from typing import Optional, Dict, Any
-from .utils import logger
-
-# Enable more detailed logging
-import logging
-logger.setLevel(logging.DEBUG)
+from .utils import logger, get_config_dir
 
 # Base URL for pipeboard API
 PIPEBOARD_API_BASE = "https://pipeboard.co/api"
@@ -77,12 +72,8 @@ class TokenInfo:
             
             return is_expired
         except Exception as e:
-            logger.error(f"Error parsing expiration date: {e}")
-            # Log the actual value to help diagnose format issues
-            logger.error(f"Invalid expires_at value: '{self.expires_at}'")
-            # Log detailed error information
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            # Log the actual value and traceback to help diagnose format issues
+            logger.exception("Error parsing expiration date %r: %s", self.expires_at, e)
             return False  # If we can't parse the date, assume it's not expired
     
     def serialize(self) -> Dict[str, Any]:
@@ -124,15 +115,8 @@ class PipeboardAuthManager:
     
     def _get_token_cache_path(self) -> Path:
         """Get the platform-specific path for token cache file"""
-        if platform.system() == "Windows":
-            base_path = Path(os.environ.get("APPDATA", ""))
-        elif platform.system() == "Darwin":  # macOS
-            base_path = Path.home() / "Library" / "Application Support"
-        else:  # Assume Linux/Unix
-            base_path = Path.home() / ".config"
-        
         # Create directory if it doesn't exist
-        cache_dir = base_path / "meta-ads-mcp"
+        cache_dir = get_config_dir()
         cache_dir.mkdir(parents=True, exist_ok=True)
         
         cache_path = cache_dir / "pipeboard_token_cache.json"
@@ -143,37 +127,31 @@ class PipeboardAuthManager:
         """Load token from cache if available"""
         cache_path = self._get_token_cache_path()
         
-        if not cache_path.exists():
+        try:
+            # Read the whole file in one call; it is parsed and, if corrupt, logged from memory
+            logger.debug(f"Reading token cache from {cache_path}")
+            payload = cache_path.read_bytes()
+            data = json.loads(payload)
+            self.token_info = TokenInfo.deserialize(data)
+            
+            # Log token details (partial token for security)
+            masked_token = self.token_info.access_token[:10] + "..." + self.token_info.access_token[-5:] if self.token_info.access_token else "None"
+            logger.debug(f"Loaded token: {masked_token}")
+            
+            # Check if token is expired
+            if self.token_info.is_expired():
+                logger.info("Cached token is expired")
+                self.token_info = None
+                return False
+            
+            logger.info(f"Loaded cached token (expires at {self.token_info.expires_at})")
+            return True
+        except FileNotFoundError:
             logger.debug(f"Token cache file not found at {cache_path}")
             return False
-        
-        try:
-            with open(cache_path, "r") as f:
-                logger.debug(f"Reading token cache from {cache_path}")
-                data = json.load(f)
-                self.token_info = TokenInfo.deserialize(data)
-                
-                # Log token details (partial token for security)
-                masked_token = self.token_info.access_token[:10] + "..." + self.token_info.access_token[-5:] if self.token_info.access_token else "None"
-                logger.debug(f"Loaded token: {masked_token}")
-                
-                # Check if token is expired
-                if self.token_info.is_expired():
-                    logger.info("Cached token is expired")
-                    self.token_info = None
-                    return False
-                
-                logger.info(f"Loaded cached token (expires at {self.token_info.expires_at})")
-                return True
         except json.JSONDecodeError as e:
             logger.error(f"Error parsing token cache file: {e}")
-            logger.debug("Token cache file might be corrupted, trying to read raw content")
-            try:
-                with open(cache_path, "r") as f:
-                    raw_content = f.read()
-                logger.debug(f"Raw cache file content (first 100 chars): {raw_content[:100]}")
-            except Exception as e2:
-                logger.error(f"Could not read raw cache file: {e2}")
+            logger.debug(f"Raw cache file content (first 100 chars): {payload[:100].decode(errors='replace')}")
             return False
         except Exception as e:
             logger.error(f"Error loading cached token: {e}")
@@ -191,8 +169,12 @@ class PipeboardAuthManager:
             token_data = self.token_info.serialize()
             logger.debug(f"Saving token to cache. Expires at: {token_data.get('expires_at')}")
             
-            with open(cache_path, "w") as f:
-                json.dump(token_data, f)
+            # Write owner-readable only, via a temp file so a crash never leaves a truncated cache
+            tmp_path = cache_path.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(token_data).encode())
+            os.replace(tmp_path, cache_path)
             logger.info(f"Token cached at: {cache_path}")
         except Exception as e:
             logger.error(f"Error saving token to cache: {e}")
@@ -389,11 +371,8 @@ class PipeboardAuthManager:
             # Remove the cached token file
             try:
                 cache_path = self._get_token_cache_path()
-                if cache_path.exists():
-                    os.remove(cache_path)
-                    logger.info(f"Removed cached token file: {cache_path}")
-                else:
-                    logger.debug(f"No token cache file to remove: {cache_path}")
+                cache_path.unlink(missing_ok=True)
+                logger.info(f"Removed cached token file: {cache_path}")
             except Exception as e:
                 logger.error(f"Error removing cached token file: {e}")
         else:
@@ -471,11 +450,8 @@ class PipeboardAuthManager:
                 
                 return False
         except Exception as e:
-            logger.error(f"TOKEN VALIDATION FAILED: Unexpected error: {str(e)}")
-            
-            # Add stack trace for debugging complex issues
-            import traceback
-            logger.error(f"Stack trace: {traceback.format_exc()}")
+            # Include the stack trace for debugging complex issues
+            logger.exception("TOKEN VALIDATION FAILED: Unexpected error: %s", e)
             
             return False
 
@@ -9,10 +9,22 @@ from .auth import login as login_auth
 from .resources import list_resources, get_resource
 from .utils import logger
 from .pipeboard_auth import pipeboard_auth_manager
+from .api import aclose_http_client
+from contextlib import asynccontextmanager
 import time
 
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP):
+    """Release the pooled Graph API connections when the server stops"""
+    try:
+        yield {}
+    finally:
+        await aclose_http_client()
+
+
 # Initialize FastMCP server
-mcp_server = FastMCP("meta-ads", use_consistent_tool_format=True)
+mcp_server = FastMCP("meta-ads", use_consistent_tool_format=True, lifespan=server_lifespan)
 
 # Register resource URIs
 mcp_server.resource(uri="meta-ads://resources")(list_resources)
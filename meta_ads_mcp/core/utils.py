@@ -1,14 +1,14 @@
 """Utility functions for Meta Ads API."""
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 import httpx
-import io
-from PIL import Image as PILImage
-import base64
 import time
 import asyncio
+import threading
+from collections import OrderedDict
 import os
 import json
+import orjson
 import logging
 import pathlib
 import platform
@@ -28,26 +28,39 @@ if not using_pipeboard:
     if not META_APP_SECRET:
         print("WARNING: META_APP_SECRET environment variable is not set. Long-lived token exchange will not work.")
 
-# Configure logging to file
-def setup_logging():
-    """Set up logging to file for troubleshooting."""
-    # Get platform-specific path for logs
-    if platform.system() == "Windows":
+# The platform never changes while running, so check it once
+_SYSTEM = platform.system()
+
+
+def get_config_dir() -> pathlib.Path:
+    """Get the platform-specific directory for logs and token caches (not created here)"""
+    if _SYSTEM == "Windows":
         base_path = pathlib.Path(os.environ.get("APPDATA", ""))
-    elif platform.system() == "Darwin":  # macOS
+    elif _SYSTEM == "Darwin":  # macOS
         base_path = pathlib.Path.home() / "Library" / "Application Support"
     else:  # Assume Linux/Unix
         base_path = pathlib.Path.home() / ".config"
-    
-    # Create directory if it doesn't exist
-    log_dir = base_path / "meta-ads-mcp"
+    return base_path / "meta-ads-mcp"
+
+
+# Configure logging to file
+def setup_logging():
+    """Set up logging to file for troubleshooting."""
+    # Create the platform-specific log directory if it doesn't exist
+    log_dir = get_config_dir()
     log_dir.mkdir(parents=True, exist_ok=True)
     
     log_file = log_dir / "meta_ads_debug.log"
     
+    # Debug logging is on by default for troubleshooting; META_ADS_MCP_LOG_LEVEL
+    # (e.g. INFO) turns it down so per-request debug formatting is skipped
+    log_level = logging.getLevelName(os.environ.get("META_ADS_MCP_LOG_LEVEL", "DEBUG").upper())
+    if not isinstance(log_level, int):
+        log_level = logging.DEBUG
+    
     # Configure file logger
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=log_level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         filename=str(log_file),
         filemode='a'  # Append mode
@@ -55,11 +68,11 @@ def setup_logging():
     
     # Create a logger
     logger = logging.getLogger("meta-ads-mcp")
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(log_level)
     
     # Log startup information
     logger.info(f"Logging initialized. Log file: {log_file}")
-    logger.info(f"Platform: {platform.system()} {platform.release()}")
+    logger.info(f"Platform: {_SYSTEM} {platform.release()}")
     logger.info(f"Using Pipeboard authentication: {using_pipeboard}")
     
     return logger
@@ -67,9 +80,185 @@ def setup_logging():
 # Create the logger instance to be imported by other modules
 logger = setup_logging()
 
+def env_number(name: str, default: Any, convert: Callable[[str], Any] = float) -> Any:
+    """
+    Read a numeric setting from the environment.
+    
+    Args:
+        name: Environment variable name
+        default: Value used when the variable is unset or malformed
+        convert: Parser for the value, e.g. int or float
+        
+    Returns:
+        The parsed value, or default
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        return convert(value)
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r, using %s", name, value, default)
+        return default
+
+
 # Global store for ad creative images
 ad_creative_images = {}
 
+# Timeouts for outbound HTTP requests. Large insights queries can take a while
+# to come back, so the read timeout can be raised with META_ADS_HTTP_READ_TIMEOUT.
+HTTP_TIMEOUT = httpx.Timeout(
+    connect=5.0,
+    read=env_number("META_ADS_HTTP_READ_TIMEOUT", 30.0),
+    write=30.0,
+    pool=5.0
+)
+
+
+def json_dumps(obj: Any, pretty: bool = False) -> str:
+    """
+    Serialize an object to JSON text for tool responses.
+    
+    Args:
+        obj: JSON-serializable object
+        pretty: Indent with two spaces, for output meant to be read by people
+        
+    Returns:
+        Compact JSON string, or indented if pretty is set
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+    return orjson.dumps(obj, option=option).decode()
+
+
+# Parse JSON text or bytes
+json_loads = orjson.loads
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a fixed TTL."""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Any, default: Any = None) -> Any:
+        """Remove key and return its value, or default if it was not cached"""
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+    
+    def discard_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Remove every entry whose key satisfies predicate"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+
+# Maximum total size of the on-disk image cache before old entries are evicted
+IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+
+def get_image_cache_dir() -> pathlib.Path:
+    """Get the platform-specific directory for cached ad images"""
+    if _SYSTEM == "Windows":
+        base_path = pathlib.Path(os.environ.get("APPDATA", ""))
+    elif _SYSTEM == "Darwin":  # macOS
+        base_path = pathlib.Path.home() / "Library" / "Caches"
+    else:  # Assume Linux/Unix
+        base_path = pathlib.Path.home() / ".cache"
+    
+    cache_dir = base_path / "meta-ads-mcp" / "images"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def read_cached_image(cache_key: str) -> Optional[bytes]:
+    """
+    Read cached JPEG bytes for an image.
+    
+    Image hashes are content-addressed, so a cached file never goes stale.
+    
+    Args:
+        cache_key: Meta image hash, optionally suffixed with render settings
+        
+    Returns:
+        JPEG bytes if cached, None otherwise
+    """
+    try:
+        cache_file = get_image_cache_dir() / f"{cache_key}.jpg"
+        data = cache_file.read_bytes()
+        # Refresh atime explicitly since many filesystems mount with noatime
+        os.utime(cache_file)
+        return data or None
+    except OSError:
+        return None
+
+
+def write_cached_image(cache_key: str, data: bytes) -> None:
+    """
+    Store JPEG bytes for an image, evicting least recently used files
+    once the cache grows past IMAGE_CACHE_MAX_BYTES.
+    
+    Args:
+        cache_key: Meta image hash, optionally suffixed with render settings
+        data: JPEG bytes to cache
+    """
+    try:
+        cache_dir = get_image_cache_dir()
+        cache_file = cache_dir / f"{cache_key}.jpg"
+        
+        # Write to a temp file first so readers never see a partial image
+        tmp_file = cache_file.with_suffix(".tmp")
+        tmp_file.write_bytes(data)
+        os.replace(tmp_file, cache_file)
+        
+        entries = []
+        total_size = 0
+        for entry in cache_dir.glob("*.jpg"):
+            stat = entry.stat()
+            entries.append((stat.st_atime, stat.st_size, entry))
+            total_size += stat.st_size
+        
+        if total_size > IMAGE_CACHE_MAX_BYTES:
+            entries.sort(key=lambda item: item[0])
+            for _, size, entry in entries:
+                if total_size <= IMAGE_CACHE_MAX_BYTES:
+                    break
+                if entry == cache_file:
+                    continue
+                entry.unlink(missing_ok=True)
+                total_size -= size
+    except OSError as e:
+        logger.warning(f"Failed to write image cache for {cache_key}: {e}")
+
+
 async def download_image(url: str) -> Optional[bytes]:
     """
     Download an image from a URL.
@@ -89,7 +278,7 @@ async def download_image(url: str) -> Optional[bytes]:
             "Accept": "*/*"
         }
         
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+        async with httpx.AsyncClient(follow_redirects=True, timeout=HTTP_TIMEOUT) as client:
             # Simple GET request just like curl
             response = await client.get(url, headers=headers)
             
@@ -138,7 +327,7 @@ async def try_multiple_download_methods(url: str) -> Optional[bytes]:
         }
         
         async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
+            response = await client.get(url, headers=headers, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
             print(f"Method 2 succeeded with cookie simulation: {len(response.content)} bytes")
             return response.content
@@ -149,9 +338,9 @@ async def try_multiple_download_methods(url: str) -> Optional[bytes]:
     try:
         async with httpx.AsyncClient(follow_redirects=True) as client:
             # First visit Facebook to get cookies
-            await client.get("https://www.facebook.com/", timeout=30.0)
+            await client.get("https://www.facebook.com/", timeout=HTTP_TIMEOUT)
             # Then try the image URL
-            response = await client.get(url, timeout=30.0)
+            response = await client.get(url, timeout=HTTP_TIMEOUT)
             response.raise_for_status()
             print(f"Method 3 succeeded with Facebook session: {len(response.content)} bytes")
             return response.content